@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ActivityRegisterConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'activity_register'
+
+    def ready(self):
+        from . import signals  # noqa
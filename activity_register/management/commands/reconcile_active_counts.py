@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from post.models import Post
+from activity_register.models import ActivityRegistration
+
+
+class Command(BaseCommand):
+    help = "คำนวณ Post.active_count ใหม่จากจำนวน ActivityRegistration สถานะ ACTIVE และแก้ค่าที่คลาดเคลื่อน"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="แสดงโพสต์ที่ค่าคลาดเคลื่อนโดยไม่แก้ไข",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        drifted = (
+            Post.objects.annotate(
+                actual=Count(
+                    "registrations",
+                    filter=Q(registrations__status=ActivityRegistration.Status.ACTIVE),
+                )
+            )
+            .exclude(active_count=F("actual"))
+            .values_list("pk", "active_count", "actual")
+        )
+
+        # นับใหม่ใน UPDATE เดียวกัน เพื่อไม่ทับการสมัคร/ยกเลิกที่เกิดขึ้นระหว่างรันคำสั่ง
+        active = (
+            ActivityRegistration.objects.filter(
+                post=OuterRef("pk"),
+                status=ActivityRegistration.Status.ACTIVE,
+            )
+            .values("post")
+            .annotate(n=Count("pk"))
+            .values("n")
+        )
+
+        fixed = 0
+        for pk, stored, actual in list(drifted):
+            self.stdout.write(f"post {pk}: active_count {stored} -> {actual}")
+            if not dry_run:
+                Post.objects.filter(pk=pk).update(active_count=Coalesce(Subquery(active), 0))
+            fixed += 1
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"พบค่าคลาดเคลื่อน {fixed} โพสต์ (dry run — ไม่ได้แก้ไข)"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"แก้ไข active_count แล้ว {fixed} โพสต์"))
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.conf import settings
 from django.utils import timezone
 from post.models import Post
@@ -99,6 +100,56 @@ class ActivityRegistration(models.Model):
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.post.title}"
 
+    # -----------------------------
+    # ✅ ดูแล Post.active_count ให้ตรงกับจำนวน ACTIVE registrations
+    # -----------------------------
+    _loaded_post_id = None
+    _loaded_status = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_counted_state()
+        return instance
+
+    def _remember_counted_state(self):
+        # จำค่า post/status ที่อยู่ในฐานข้อมูล เพื่อรู้ว่า save ครั้งถัดไปเปลี่ยนจำนวนผู้สมัครหรือไม่
+        self._loaded_post_id = self.__dict__.get("post_id")
+        self._loaded_status = self.__dict__.get("status")
+
+    def _counted_post_id(self):
+        """post ที่ registration นี้ถูกนับอยู่ใน active_count (None = ไม่ถูกนับ)"""
+        if self._loaded_status == self.Status.ACTIVE:
+            return self._loaded_post_id
+        return None
+
+    def _bump_active_count(self, post_id, delta):
+        qs = Post.objects.filter(pk=post_id)
+        if delta < 0:
+            qs = qs.filter(active_count__gte=-delta)  # กันค่าติดลบถ้าตัวนับคลาดเคลื่อนอยู่แล้ว
+        qs.update(active_count=F("active_count") + delta)
+        # อัปเดตค่าบน post ที่ view ถืออยู่ด้วย (เช่นเช็ค is_full() ต่อหลังสมัคร)
+        if ActivityRegistration.post.is_cached(self) and self.post.pk == post_id:
+            fresh = Post.objects.filter(pk=post_id).values_list("active_count", flat=True).first()
+            if fresh is not None:
+                self.post.active_count = fresh
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and not {"status", "post", "post_id"} & set(update_fields):
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            old_post_id = self._counted_post_id()
+            new_post_id = self.post_id if self.status == self.Status.ACTIVE else None
+            if old_post_id != new_post_id:
+                if old_post_id is not None:
+                    self._bump_active_count(old_post_id, -1)
+                if new_post_id is not None:
+                    self._bump_active_count(new_post_id, 1)
+        self._remember_counted_state()
+
     def can_cancel(self) -> bool:
         if not self.post.event_date:
             return False
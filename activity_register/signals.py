@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import ActivityRegistration
+
+
+@receiver(post_delete, sender=ActivityRegistration)
+def decrement_active_count_on_delete(sender, instance: ActivityRegistration, **kwargs):
+    """ลบ registration ที่ยัง ACTIVE (รวมถึงลบผ่าน queryset / admin) -> ลด Post.active_count"""
+    post_id = instance._counted_post_id()
+    if post_id is not None:
+        instance._bump_active_count(post_id, -1)
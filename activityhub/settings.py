@@ -39,13 +39,14 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'users',
     'login_register',
-    'home',
+    'home.apps.HomeConfig',
     'approver',
     'post.apps.PostConfig',
-    'activity_register',
+    'activity_register.apps.ActivityRegisterConfig',
     'channels',
     'chat',   
     'notifications.apps.NotificationsConfig',
+    'search.apps.SearchConfig',
     
 ]
 
@@ -155,3 +156,21 @@ CHANNEL_LAYERS = {
         },
     },
 }
+
+# ✅ cache ใช้ร่วมกันทุก process (web / run_notification_worker / cron) — ตัวนับ unread, feed version ฯลฯ
+#    ถูกลบ/เปลี่ยนจาก process อื่น จึงใช้ LocMemCache (แยกต่อ process) ไม่ได้
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://127.0.0.1:6379/1",  # คนละ db กับ channel layer
+        "KEY_PREFIX": "activityhub",
+    },
+}
+
+# ✅ งานแจ้งเตือน (fan-out + push realtime) ทำใน worker นอก request: python manage.py run_notification_worker
+#    ตั้งเป็น False เพื่อทำทันทีใน request แบบเดิม (เช่นตอนพัฒนาที่ไม่ได้รัน worker)
+NOTIFICATION_OUTBOX_ENABLED = True
+
+# ✅ python manage.py prune_notifications: เก็บแจ้งเตือนที่อ่านแล้วไว้กี่วัน และโฟลเดอร์ archive (None = ลบอย่างเดียว)
+NOTIFICATION_RETENTION_DAYS = 90
+NOTIFICATION_ARCHIVE_DIR = None
@@ -34,6 +34,11 @@ def inbox_view(request):
         .order_by('-last_time', '-created_at')
     )
 
+    rooms_qs = list(rooms_qs)
+    # ✅ จำนวนข้อความที่ยังไม่อ่านของทุกห้องจากตัวนับต่อ (ผู้ใช้, ห้อง) ใน query เดียว
+    from notifications.chat_unread import counts_by_room
+    unread_by_room = counts_by_room(request.user.pk, [room.id for room in rooms_qs])
+
     rooms_data = []
 
     for room in rooms_qs:
@@ -105,7 +110,7 @@ def inbox_view(request):
             'last_message': last_text,
             'last_time': last_time,
             'is_group': (room.room_type == 'GROUP'),
-            'unread_count': ChatMessage.objects.filter(room=room, is_read=False).exclude(sender=request.user).count(),
+            'unread_count': unread_by_room.get(room.id, 0),
         })
 
     # rooms_qs already ordered by last_time desc; keep current list order
@@ -143,13 +148,10 @@ def activity_chat_view(request, post_id):
     except Exception:
         pass
 
-    # และทำเครื่องหมาย Notification ของแชทนี้เป็นอ่านแล้ว (ถ้ามี)
+    # และรีเซ็ตตัวนับข้อความที่ยังไม่อ่านของห้องนี้ (แถวเดียวต่อผู้ใช้+ห้อง)
     try:
-        from notifications.models import Notification
-        if room.room_type == 'GROUP' and room.post_id:
-            Notification.objects.filter(user=request.user, kind=Notification.Kind.CHAT_MESSAGE, link_url=f"/chat/activity/{room.post_id}/", is_read=False).update(is_read=True)
-        elif room.room_type == 'DM':
-            Notification.objects.filter(user=request.user, kind=Notification.Kind.CHAT_MESSAGE, link_url__startswith="/chat/dm/", is_read=False).update(is_read=True)
+        from notifications.chat_unread import mark_room_read
+        mark_room_read(request.user.pk, room.id)
     except Exception:
         pass
 
@@ -177,8 +179,8 @@ def activity_chat_view(request, post_id):
         pass
 
     try:
-        from notifications.models import Notification
-        Notification.objects.filter(user=request.user, kind=Notification.Kind.CHAT_MESSAGE, link_url__startswith=f"/chat/dm/", is_read=False).update(is_read=True)
+        from notifications.chat_unread import mark_room_read
+        mark_room_read(request.user.pk, room.id)
     except Exception:
         pass
 
@@ -0,0 +1,185 @@
+"""
+cache ของ feed หลัก แบ่งเป็น 2 ชั้น
+
+1) ชั้นกลาง (ใช้ร่วมกันทุกคน): HTML ส่วนที่ไม่ขึ้นกับผู้ดู ของการ์ดแต่ละโพสต์
+   (ผู้จัด รูป รายละเอียด) + จำนวนรีวิว/ถูกใจ, รายการ id ของแต่ละหน้า feed ต่อหมวดหมู่
+   และผลค้นหาที่เรียงแล้วต่อชุดคำค้น + หมวดหมู่
+2) ชั้นผู้ดู (overlay เล็กๆ ต่อคน): โพสต์ที่ถูกใจ / จัดเก็บ
+   (ผู้จัดที่ติดตามอยู่อ่านจาก users.follow_graph)
+
+ลบ/เปลี่ยนเวอร์ชันด้วย signal เมื่อข้อมูลที่เกี่ยวข้องเปลี่ยน (ดู home.signals และ notifications.signals)
+ทุกคีย์รวมถึงตัวนับเวอร์ชันอยู่ใน cache ที่ใช้ร่วมกันทุก process (settings.CACHES = Redis)
+การ bump จาก process ใดก็ตามจึงมีผลกับทุก worker ทันที
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.db.models import Count
+from django.template.loader import render_to_string
+
+from activity_register.models import ActivityReview
+from post.models import Post
+from users import follow_graph
+
+FEED_CACHE_TIMEOUT = 60 * 10
+
+_VERSION_KEY = "feed:version"
+
+
+def _card_key(post_id):
+    return f"feed:card:{post_id}"
+
+
+def _viewer_key(user_pk):
+    return f"feed:viewer:{user_pk}"
+
+
+def _initial_version():
+    return time.time_ns() // 1000
+
+
+def feed_version():
+    """เวอร์ชันของชุดโพสต์ที่แสดงได้ (เพิ่มขึ้นทุกครั้งที่โพสต์เปลี่ยน) ใช้ประกอบคีย์ cache / ETag"""
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        # เริ่มจากเวลาปัจจุบัน (ไม่ใช่ 1) — ถ้าคีย์ถูก evict แล้วเริ่มใหม่ จะไม่ชนกับ entry ของเวอร์ชันเก่าที่ยังไม่หมดอายุ
+        initial = _initial_version()
+        cache.add(_VERSION_KEY, initial, None)
+        version = cache.get(_VERSION_KEY, initial)
+    return version
+
+
+def bump_feed_version():
+    """
+    ทำให้รายการ id ของทุกหน้า feed และผลค้นหาที่ cache ไว้หมดอายุ
+    (โพสต์ถูกเพิ่ม/อนุมัติ/ซ่อน/ลบ/แก้ไข หรือชื่อผู้จัดเปลี่ยน)
+    """
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        cache.set(_VERSION_KEY, _initial_version(), None)
+
+
+def cached_page_ids(category, cursor, compute):
+    """
+    รายการ id ของหน้า feed (ไม่ขึ้นกับผู้ดู) ต่อหมวดหมู่ + cursor
+    compute() ต้องคืน (list id, next_cursor)
+    """
+    key = f"feed:page:v{feed_version()}:{category or ''}:{cursor or ''}"
+    page = cache.get(key)
+    if page is None:
+        page = compute()
+        cache.set(key, page, FEED_CACHE_TIMEOUT)
+    return page
+
+
+def cached_versioned(name, compute):
+    """
+    ค่าที่คำนวณจากโพสต์ที่แสดงได้ทั้งหมด (เช่น cluster ของแผนที่) — หมดอายุพร้อม feed version
+    compute() คืนค่าที่ pickle ได้
+    """
+    key = f"feed:{name}:v{feed_version()}"
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, FEED_CACHE_TIMEOUT)
+    return value
+
+
+def _search_key(category, tokens, phrase):
+    # คีย์ของ memcached ห้ามมีช่องว่างและยาวได้จำกัด -> hash ชุดคำค้น
+    # ลำดับคำค้นไม่มีผลกับคะแนน (ผลรวมต่อคำ) จึงเรียงก่อน; วลีเต็มใช้ให้คะแนนพิเศษจึงต้องอยู่ในคีย์ด้วย
+    raw = json.dumps(
+        [sorted({t.lower() for t in tokens}), " ".join(phrase.lower().split())],
+        ensure_ascii=False,
+    )
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    return f"feed:search:v{feed_version()}:{category or ''}:{digest}"
+
+
+def cached_search_keys(category, tokens, phrase, compute):
+    """
+    ผลค้นหาที่เรียงแล้ว [(score, created_at, id), ...] (ไม่ขึ้นกับผู้ดู) ต่อชุดคำค้น + หมวดหมู่
+    compute() ต้องคืน list คีย์ดังกล่าว — ทุกหน้าของผลค้นหาเดียวกันใช้ entry เดียวกัน
+    """
+    key = _search_key(category, tokens, phrase)
+    keys = cache.get(key)
+    if keys is None:
+        keys = compute()
+        cache.set(key, keys, FEED_CACHE_TIMEOUT)
+    return keys
+
+
+def attach_shared_cards(posts):
+    """ใส่ post.card = {head, media, text, review_count, likes_count} จาก cache (render/นับเฉพาะที่ไม่มีใน cache)"""
+    keys = {_card_key(p.pk): p for p in posts}
+    found = cache.get_many(list(keys))
+
+    missing = [p for key, p in keys.items() if key not in found]
+    if missing:
+        ids = [p.pk for p in missing]
+        review_counts = dict(
+            ActivityReview.objects.filter(post_id__in=ids)
+            .values("post_id").annotate(n=Count("id")).values_list("post_id", "n")
+        )
+        like_counts = dict(
+            Post.likes.through.objects.filter(post_id__in=ids)
+            .values("post_id").annotate(n=Count("id")).values_list("post_id", "n")
+        )
+        fresh = {}
+        for p in missing:
+            fresh[_card_key(p.pk)] = {
+                "head": render_to_string("home/_post_card_head.html", {"post": p}),
+                "media": render_to_string("home/_post_card_body.html", {"post": p, "part": "media"}),
+                "text": render_to_string("home/_post_card_body.html", {"post": p, "part": "text"}),
+                "review_count": review_counts.get(p.pk, 0),
+                "likes_count": like_counts.get(p.pk, 0),
+            }
+        cache.set_many(fresh, FEED_CACHE_TIMEOUT)
+        found.update(fresh)
+
+    for key, p in keys.items():
+        p.card = found[key]
+
+
+def viewer_state(user):
+    """overlay ของผู้ดู: {liked, saved} (set ของ post id)"""
+    if not user.is_authenticated:
+        return None
+    key = _viewer_key(user.pk)
+    state = cache.get(key)
+    if state is None:
+        state = {
+            "liked": set(user.liked_posts.values_list("id", flat=True)),
+            "saved": set(user.saved_posts.values_list("id", flat=True)),
+        }
+        cache.set(key, state, FEED_CACHE_TIMEOUT)
+    return state
+
+
+def apply_viewer_state(posts, user):
+    state = viewer_state(user)
+    following = follow_graph.following_ids(user.pk) if state else frozenset()
+    for p in posts:
+        p.is_liked = bool(state) and p.pk in state["liked"]
+        p.is_saved = bool(state) and p.pk in state["saved"]
+        p.is_following = p.organizer_id in following
+
+
+def invalidate_post(post_id):
+    cache.delete(_card_key(post_id))
+    bump_feed_version()
+
+
+def invalidate_cards(post_ids):
+    cache.delete_many([_card_key(pk) for pk in post_ids])
+
+
+def invalidate_organizer_cards(user_pk):
+    invalidate_cards(Post.objects.filter(organizer_id=user_pk).values_list("id", flat=True))
+
+
+def invalidate_viewers(user_pks):
+    cache.delete_many([_viewer_key(pk) for pk in user_pks])
@@ -0,0 +1,102 @@
+"""
+รวมหมุดกิจกรรมเป็นกลุ่ม (cluster) สำหรับแผนที่ที่ซูมออก
+
+แบ่งแผนที่เป็นกริดตาม tile ของ Web Mercator: ที่ซูม z มี (2^z * CELLS_PER_TILE) ช่องต่อแกน
+ช่องของซูม z หนึ่งช่อง = ช่องของซูม z+1 สี่ช่องพอดี จึงสร้างทุกระดับจากระดับละเอียดสุด
+ขึ้นไปทีละชั้น (แบบ supercluster) และ cache ทุกระดับไว้ด้วยกันจนกว่าโพสต์จะเปลี่ยน
+"""
+import hashlib
+import json
+import math
+
+from django.db.models import Avg, Count
+
+from post import geo
+from . import feed_cache
+
+# ซูมตั้งแต่ระดับนี้ขึ้นไปแสดงหมุดจริง (ช่อง cluster ของซูม 9 ยังใหญ่กว่าช่อง map_cell 0.1°)
+CLUSTER_MAX_ZOOM = 10
+
+# จำนวนช่องต่อ tile 256px หนึ่งแผ่น (ช่องละประมาณ 64px บนจอ)
+CELLS_PER_TILE = 4
+
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def _mercator_xy(lat, lng):
+    """พิกัด -> (x, y) ใน [0, 1) ของ Web Mercator"""
+    lat = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))
+    x = (lng + 180) / 360
+    s = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + s) / (1 - s)) / (4 * math.pi)
+    return min(x, 1 - 1e-12), min(max(y, 0.0), 1 - 1e-12)
+
+
+def _base_points(filters):
+    """
+    จุดระดับละเอียดสุด: หนึ่งจุดต่อช่อง map_cell (จำนวน + ค่าเฉลี่ยพิกัด)
+    นับด้วย GROUP BY ในฐานข้อมูล ไม่ต้องโหลดโพสต์ทีละแถว
+    """
+    rows = (
+        geo.map_posts(filters)
+        .exclude(map_cell__isnull=True)
+        .order_by()
+        .values("map_cell")
+        .annotate(n=Count("id"), lat=Avg("map_lat"), lng=Avg("map_lng"))
+    )
+    return [(r["lat"], r["lng"], r["n"]) for r in rows]
+
+
+def _build_levels(filters):
+    """
+    คืน dict {zoom: [(lat, lng, count), ...]} ของทุกซูมที่ต่ำกว่า CLUSTER_MAX_ZOOM
+    centroid ของแต่ละกลุ่มเป็นค่าเฉลี่ยถ่วงน้ำหนักด้วยจำนวนโพสต์
+    """
+    finest = CLUSTER_MAX_ZOOM - 1
+    side = (2 ** finest) * CELLS_PER_TILE
+
+    # cells[(cx, cy)] = [sum_lat, sum_lng, count]
+    cells = {}
+    for lat, lng, n in _base_points(filters):
+        x, y = _mercator_xy(lat, lng)
+        acc = cells.setdefault((int(x * side), int(y * side)), [0.0, 0.0, 0])
+        acc[0] += lat * n
+        acc[1] += lng * n
+        acc[2] += n
+
+    levels = {}
+    for zoom in range(finest, -1, -1):
+        levels[zoom] = [(s_lat / n, s_lng / n, n) for s_lat, s_lng, n in cells.values()]
+        parents = {}
+        for (cx, cy), (s_lat, s_lng, n) in cells.items():
+            acc = parents.setdefault((cx >> 1, cy >> 1), [0.0, 0.0, 0])
+            acc[0] += s_lat
+            acc[1] += s_lng
+            acc[2] += n
+        cells = parents
+    return levels
+
+
+def _in_bbox(lat, lng, bbox):
+    west, south, east, north = bbox
+    if not south <= lat <= north:
+        return False
+    if west <= east:
+        return west <= lng <= east
+    return lng >= west or lng <= east
+
+
+def clusters_in_bbox(bbox, zoom, filters=None):
+    """
+    กลุ่มหมุดของซูม `zoom` ที่ centroid อยู่ในกรอบ bbox: [{lat, lng, count}, ...]
+    แต่ละชุดตัวกรอง (ช่วงวันที่ / หมวดหมู่ — ดู post.geo.parse_filters) cache แยกกัน
+    """
+    filters = filters or {}
+    digest = hashlib.sha1(json.dumps(filters, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    levels = feed_cache.cached_versioned(f"map-clusters:{digest}", lambda: _build_levels(filters))
+    zoom = max(0, min(zoom, CLUSTER_MAX_ZOOM - 1))
+    return [
+        {"lat": lat, "lng": lng, "count": n}
+        for lat, lng, n in levels.get(zoom, [])
+        if _in_bbox(lat, lng, bbox)
+    ]
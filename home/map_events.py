@@ -0,0 +1,60 @@
+"""
+บริการข้อมูลหมุดแผนที่ที่ใช้ร่วมกันทุกหน้าแผนที่ (แผนที่รวม / ใกล้ตัว / overview)
+
+- serialize JSON ครั้งเดียวต่อ "posts version" + พารามิเตอร์ แล้วเก็บเป็น bytes ใน cache
+- ETag คือ hash ของ body เอง (เก็บคู่กับ body ใน cache) จึงตอบ 304 ได้จาก cache โดยไม่ต้องอ่านฐานข้อมูล
+  และไม่ตอบ 304 ผิดแม้ worker คนละตัวจะเห็นเวอร์ชันไม่ตรงกัน (ETag เท่ากัน = ข้อมูลเท่ากันเสมอ)
+- หมดอายุพร้อม feed version (bump ทุกครั้งที่โพสต์ถูกอนุมัติ/แก้ไข/ซ่อน/ลบ — ดู home.feed_cache)
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+
+from . import feed_cache
+
+
+def _digest(name, params):
+    raw = json.dumps([name, params], sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get("If-None-Match", "")
+    return etag in [t.strip() for t in header.split(",")] or header.strip() == "*"
+
+
+def cached_response(request, name, params, build_body, content_type):
+    """
+    คืน bytes จาก build_body() สำหรับชุดพารามิเตอร์ `params` (cache ต่อ posts version)
+    พร้อม ETag (hash ของ body) — ถ้า client ส่ง If-None-Match ตรงกับ body ปัจจุบันตอบ 304
+    """
+    digest = _digest(name, params)
+    key = f"feed:map:v{feed_cache.feed_version()}:{digest}"
+    cached = cache.get(key)
+    if cached is None:
+        body = build_body()
+        cached = (f'"map-{hashlib.sha1(body).hexdigest()[:20]}"', body)
+        cache.set(key, cached, feed_cache.FEED_CACHE_TIMEOUT)
+    etag, body = cached
+
+    if _etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type=content_type)
+
+    response["ETag"] = etag
+    # ให้ browser เก็บไว้แต่ถามกลับทุกครั้ง (ได้ 304 ถ้าโพสต์ยังไม่เปลี่ยน)
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def json_response(request, name, params, compute):
+    """JSON ของ compute() (dict) ผ่าน cached_response"""
+    def _body():
+        return json.dumps(compute(), cls=DjangoJSONEncoder, ensure_ascii=False).encode("utf-8")
+
+    return cached_response(request, name, params, _body, "application/json")
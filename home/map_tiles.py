@@ -0,0 +1,84 @@
+"""
+ข้อมูลหมุดแผนที่แบบ binary ต่อ tile (z/x/y แบบเดียวกับ tile ของ OpenStreetMap)
+
+รูปแบบ (little-endian ทุกฟิลด์ ทุกคอลัมน์ยาว 4 byte ต่อแถว จึงอ่านด้วย DataView ได้ตรงๆ):
+
+    header 16 byte : magic "AHEV" | format u8 | kind u8 | flags u16 | count u32 | n_strings u32
+    flags          : bit 0 = FLAG_TRUNCATED (หมุดถูกตัดที่ MAP_EVENTS_LIMIT เหมือน `truncated` ของ JSON)
+                     bit อื่นสงวนไว้ (0)
+    kind = KIND_EVENTS  : id u32[count] | lat f32[count] | lng f32[count]
+                          | title u32[count] | location u32[count] | date u32[count]   (ลำดับใน string table)
+    kind = KIND_CLUSTERS: lat f32[count] | lng f32[count] | n u32[count]
+    string table        : byte length u32[n_strings] | ข้อความ UTF-8 ต่อกัน
+
+ข้อความที่ซ้ำกัน (สถานที่ วันที่) เก็บครั้งเดียวใน string table
+"""
+import math
+import struct
+
+MAGIC = b"AHEV"
+FORMAT_VERSION = 1
+
+KIND_EVENTS = 0
+KIND_CLUSTERS = 1
+
+FLAG_TRUNCATED = 1 << 0
+
+CONTENT_TYPE = "application/octet-stream"
+
+
+def tile_bbox(z, x, y):
+    """tile (z, x, y) -> (west, south, east, north)"""
+    n = 2 ** z
+
+    def lat(ty):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return x / n * 360 - 180, lat(y + 1), (x + 1) / n * 360 - 180, lat(y)
+
+
+def _header(kind, count, n_strings, flags=0):
+    return MAGIC + struct.pack("<BBHII", FORMAT_VERSION, kind, flags, count, n_strings)
+
+
+def _column(fmt, values):
+    return struct.pack(f"<{len(values)}{fmt}", *values)
+
+
+def encode_events(events, truncated=False):
+    """list ของ event_dict (post.geo) -> bytes (truncated -> ตั้ง FLAG_TRUNCATED)"""
+    strings = []
+    index = {}
+
+    def ref(text):
+        if text not in index:
+            index[text] = len(strings)
+            strings.append(text)
+        return index[text]
+
+    titles = [ref(ev["title"]) for ev in events]
+    locations = [ref(ev["location"]) for ev in events]
+    dates = [ref(ev["date"]) for ev in events]
+    encoded = [s.encode("utf-8") for s in strings]
+
+    return b"".join([
+        _header(KIND_EVENTS, len(events), len(strings), FLAG_TRUNCATED if truncated else 0),
+        _column("I", [ev["id"] for ev in events]),
+        _column("f", [ev["lat"] for ev in events]),
+        _column("f", [ev["lng"] for ev in events]),
+        _column("I", titles),
+        _column("I", locations),
+        _column("I", dates),
+        _column("I", [len(b) for b in encoded]),
+        *encoded,
+    ])
+
+
+def encode_clusters(clusters):
+    """list ของ {lat, lng, count} (home.map_clusters) -> bytes"""
+    return b"".join([
+        _header(KIND_CLUSTERS, len(clusters), 0),
+        _column("f", [c["lat"] for c in clusters]),
+        _column("f", [c["lng"] for c in clusters]),
+        _column("I", [c["count"] for c in clusters]),
+    ])
@@ -0,0 +1,94 @@
+import base64
+import json
+import math
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_aware
+
+# จำนวนโพสต์ต่อหน้าของ feed (หน้าแรก render จาก server ที่เหลือโหลดผ่าน API ตอนเลื่อนลง)
+FEED_PAGE_SIZE = 12
+
+
+def encode_cursor(*values):
+    raw = json.dumps(values, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """คืน list ของค่าใน cursor หรือ None ถ้า cursor ว่าง/ไม่ถูกต้อง"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def _parse_time_key(values):
+    # cursor ของ feed ปกติ = [created_at, id]
+    if not values or len(values) != 2:
+        return None
+    created_at = parse_datetime(str(values[0]))
+    if created_at is None or not isinstance(values[1], int):
+        return None
+    return created_at, values[1]
+
+
+def _parse_ranked_key(values):
+    # cursor ของผลค้นหา = [score, created_at, id] — ชนิดต้องตรงกับคีย์ใน ranked_keys ไม่งั้นเทียบ tuple แล้ว TypeError
+    if not values or len(values) != 3:
+        return None
+    score, created_at, pk = values
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not math.isfinite(score):
+        return None
+    created_at = parse_datetime(str(created_at))
+    if created_at is None or not is_aware(created_at):
+        return None
+    if isinstance(pk, bool) or not isinstance(pk, int):
+        return None
+    return score, created_at, pk
+
+
+def keyset_page(posts, cursor=None, size=FEED_PAGE_SIZE):
+    """
+    แบ่งหน้า queryset ตาม (created_at, id) จากใหม่ไปเก่า
+    ใช้ WHERE แทน OFFSET จึงเร็วเท่ากันทุกหน้า คืน (list โพสต์, cursor หน้าถัดไปหรือ None)
+    """
+    posts = posts.order_by("-created_at", "-id")
+    key = _parse_time_key(decode_cursor(cursor))
+    if key:
+        created_at, pk = key
+        posts = posts.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    page = list(posts[:size + 1])
+    next_cursor = None
+    if len(page) > size:
+        page = page[:size]
+        last = page[-1]
+        next_cursor = encode_cursor(last.created_at.isoformat(), last.pk)
+    return page, next_cursor
+
+
+def ranked_page(ranked_keys, cursor=None, size=FEED_PAGE_SIZE):
+    """
+    แบ่งหน้าผลค้นหาที่เรียงด้วยคีย์ (score, created_at, id) จากมากไปน้อยแล้ว
+    คืน (list id ของหน้านี้, cursor หน้าถัดไปหรือ None)
+    """
+    # cursor ที่ไม่ถูกต้อง (แก้เอง/เสีย) -> เริ่มหน้าแรก เหมือน keyset_page
+    after = _parse_ranked_key(decode_cursor(cursor))
+    start = 0
+    if after:
+        start = next(
+            (i for i, key in enumerate(ranked_keys) if key < after),
+            len(ranked_keys),
+        )
+
+    keys = ranked_keys[start:start + size]
+    next_cursor = None
+    if start + size < len(ranked_keys):
+        score, created_at, pk = keys[-1]
+        next_cursor = encode_cursor(score, created_at.isoformat(), pk)
+    return [pk for _, _, pk in keys], next_cursor
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from activity_register.models import ActivityReview
+from post.models import Post
+from users.models import Profile
+from . import feed_cache
+
+# (การแก้ไข/อนุมัติ/ซ่อน/ลบโพสต์ ล้าง cache ใน notifications.signals.notify_users_when_post_updated)
+
+
+@receiver(post_delete, sender=Post)
+def drop_deleted_post_card(sender, instance: Post, **kwargs):
+    feed_cache.invalidate_post(instance.pk)
+
+
+@receiver(post_save, sender=ActivityReview)
+@receiver(post_delete, sender=ActivityReview)
+def refresh_review_count(sender, instance: ActivityReview, **kwargs):
+    feed_cache.invalidate_cards([instance.post_id])
+
+
+def _changed_pairs(instance, reverse, pk_set):
+    """คืน (post ids, user ids) ที่ถูกเปลี่ยนจาก m2m_changed ของ Post.likes / Post.saves"""
+    if reverse:
+        return (pk_set or []), [instance.pk]
+    return [instance.pk], (pk_set or [])
+
+
+@receiver(m2m_changed, sender=Post.likes.through)
+def refresh_likes(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    post_ids, user_pks = _changed_pairs(instance, reverse, pk_set)
+    feed_cache.invalidate_cards(post_ids)  # จำนวนถูกใจ
+    feed_cache.invalidate_viewers(user_pks)
+
+
+@receiver(m2m_changed, sender=Post.saves.through)
+def refresh_saves(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    _, user_pks = _changed_pairs(instance, reverse, pk_set)
+    feed_cache.invalidate_viewers(user_pks)
+
+
+# ฟิลด์ของผู้จัดที่แสดงในส่วนหัวการ์ด
+CARD_ORGANIZER_FIELDS = {"first_name", "last_name", "email", "profile_picture"}
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_save, sender=Profile)
+def refresh_organizer_cards(sender, instance, created, update_fields=None, **kwargs):
+    """ชื่อ/รูปโปรไฟล์ผู้จัดอยู่ในส่วนหัวการ์ดที่ cache ไว้"""
+    if created:
+        return
+    # เช่น login อัปเดตเฉพาะ last_login -> การ์ดไม่เปลี่ยน
+    if update_fields and not (set(update_fields) & CARD_ORGANIZER_FIELDS):
+        return
+    feed_cache.invalidate_organizer_cards(instance.pk)
+    if sender is not Profile:
+        # ชื่อ/อีเมลผู้จัดถูก index ไว้ค้นหา -> ผลค้นหาที่ cache ไว้อาจเปลี่ยน
+        feed_cache.bump_feed_version()
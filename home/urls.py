@@ -6,13 +6,22 @@ app_name = 'home'
 urlpatterns = [
     path('', views.index_view, name='index'),
     path('home/', views.home_view, name='home'),
+    path('home/api/feed/', views.home_feed_api, name='feed_api'),
 
     # แผนที่รวมทุกกิจกรรม (ดูอย่างเดียว – ใช้ในเมนูก่อนล็อกอิน)
     path('map/', views.public_map_view, name='map'),
 
+    # หมุดกิจกรรมในกรอบแผนที่ (?bbox=west,south,east,north&zoom=)
+    path('map/events/', views.map_events_api, name='map_events'),
+
+    # หมุดกิจกรรมแบบ binary ต่อ tile (หน้าแผนที่รวมใช้ตัวนี้)
+    path('map/tiles/<int:z>/<int:x>/<int:y>.bin', views.map_tile_api, name='map_tile'),
+
     # แผนที่กิจกรรมใกล้ตัว (ต้องล็อกอิน ใช้ geolocation + รัศมี 30 กม.)
     path('map/nearby/', views.nearby_map_view, name='map_nearby'),
+    path('map/nearby/events/', views.map_nearby_events_api, name='map_nearby_events'),
 
     path("about/", views.about, name="about"),
     path('category/', views.category_view, name='category'),
+    path('category/api/feed/', views.category_feed_api, name='category_feed_api'),
 ]
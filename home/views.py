@@ -1,89 +1,28 @@
+import math
+
 from django.shortcuts import render, get_object_or_404, redirect
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
+from django.views.decorators.http import require_GET
 from django.contrib.auth.decorators import login_required
-from django.core.serializers.json import DjangoJSONEncoder
-from django.db.models import Avg, Q, Count, Exists, OuterRef, Value, BooleanField
+from django.db.models import Avg
 from post.models import Post
 from activity_register.models import ActivityReview, ActivityRegistration
 from chat.models import ChatRoom
-import json
 from django.contrib.auth import get_user_model
-from users.models import Profile  # ✅ เพิ่มเพื่อเช็คสถานะติดตาม
+from search.fuzzy import fuzzy_scores
+from search.query import matching_post_ids
+from search.ranking import rank_post_keys, score_posts
+from search.tokenizer import parse_query
 from django.utils import timezone
-import datetime
-import re
-import difflib
+from post import geo
+from . import feed_cache, map_clusters, map_events, map_tiles
+from .pagination import keyset_page, ranked_page
 
 
 def _normalize_search_query(raw):
-    """
-    Normalize user search input to help matching:
-    - map Thai month names/abbreviations to month numbers and English short names
-    - convert Buddhist year (พ.ศ.) to Gregorian year (ค.ศ.) and add both forms
-    - return list of tokens to search for
-    """
-    if not raw:
-        return []
-
-    s = raw.strip()
-
-    # map Thai month names to month numbers and english short names
-    thai_months = {
-        'มกราคม': ('01', 'Jan'), 'ม.ค.': ('01', 'Jan'), 'ม.ค': ('01', 'Jan'),
-        'กุมภาพันธ์': ('02', 'Feb'), 'ก.พ.': ('02', 'Feb'), 'ก.พ': ('02', 'Feb'),
-        'มีนาคม': ('03', 'Mar'), 'มี.ค.': ('03', 'Mar'), 'มี.ค': ('03', 'Mar'),
-        'เมษายน': ('04', 'Apr'), 'เม.ย.': ('04', 'Apr'), 'เม.ย': ('04', 'Apr'),
-        'พฤษภาคม': ('05', 'May'), 'พ.ค.': ('05', 'May'), 'พ.ค': ('05', 'May'),
-        'มิถุนายน': ('06', 'Jun'), 'มิ.ย.': ('06', 'Jun'), 'มิ.ย': ('06', 'Jun'),
-        'กรกฎาคม': ('07', 'Jul'), 'ก.ค.': ('07', 'Jul'), 'ก.ค': ('07', 'Jul'),
-        'สิงหาคม': ('08', 'Aug'), 'ส.ค.': ('08', 'Aug'), 'ส.ค': ('08', 'Aug'),
-        'กันยายน': ('09', 'Sep'), 'ก.ย.': ('09', 'Sep'), 'ก.ย': ('09', 'Sep'),
-        'ตุลาคม': ('10', 'Oct'), 'ต.ค.': ('10', 'Oct'), 'ต.ค': ('10', 'Oct'),
-        'พฤศจิกายน': ('11', 'Nov'), 'พ.ย.': ('11', 'Nov'), 'พ.ย': ('11', 'Nov'),
-        'ธันวาคม': ('12', 'Dec'), 'ธ.ค.': ('12', 'Dec'), 'ธ.ค': ('12', 'Dec'),
-    }
-
-    tokens = []
-
-    # find 4-digit years in query and convert BE->CE if looks like BE
-    years = re.findall(r'\b(\d{4})\b', s)
-    for y in years:
-        try:
-            yi = int(y)
-            tokens.append(y)
-            if yi > 2400:  # likely Buddhist year
-                ce = yi - 543
-                tokens.append(str(ce))
-        except Exception:
-            pass
-
-    # replace thai month names with month numbers and english short name tokens
-    for k, (mn, en) in thai_months.items():
-        if k in s:
-            tokens.append(k)
-            tokens.append(mn)
-            tokens.append(en)
-            s = s.replace(k, ' ')
-
-    # split remaining by non-word to get tokens
-    more = re.split(r'\W+', s)
-    for t in more:
-        if t:
-            tokens.append(t)
-
-    # dedupe and lowercase
-    seen = set()
-    out = []
-    for t in tokens:
-        tl = t.strip()
-        if not tl:
-            continue
-        tl_lower = tl.lower()
-        if tl_lower in seen:
-            continue
-        seen.add(tl_lower)
-        out.append(tl)
-
-    return out
+    """แปลงข้อความค้นหาเป็นรายการคำค้น (เดือนไทย/ปี พ.ศ. — ดู search.tokenizer.parse_query)"""
+    return parse_query(raw)
 
 
 def index_view(request):
@@ -118,11 +57,26 @@ def about(request):
     return render(request, "home/about.html", context)
 
 
-def home_view(request):
+def _mark_show_register(posts):
+    # compute show_register for each post (hide when closed, full, or within 1 day of event)
+    now = timezone.now()
+    for p in posts:
+        try:
+            within_cutoff = False
+            if p.event_date:
+                within_cutoff = now <= (p.event_date - timezone.timedelta(days=1))
+            else:
+                within_cutoff = True
+
+            p.show_register = bool(p.allow_register and within_cutoff and (not p.is_full()))
+        except Exception:
+            p.show_register = bool(p.allow_register)
+
+
+def _home_feed_page(request, cursor=None):
     """
-    หน้า feed หลัก
-    - รองรับการกรองตามหมวดหมู่ (category)
-    - รองรับการค้นหา (search) ตามชื่อกิจกรรม / รายละเอียด / สถานที่ / ชื่อผู้จัด
+    โพสต์หนึ่งหน้าของ feed หลัก (ตาม category / search ใน query string)
+    คืน (list โพสต์, cursor หน้าถัดไปหรือ None)
     """
     posts = Post.objects.filter(
         status=Post.Status.APPROVED,
@@ -130,218 +84,121 @@ def home_view(request):
         is_deleted=False,
     )
 
-    # ✅ จำนวนรีวิวต่อโพสต์ (reverse name = activity_reviews)
-    posts = posts.annotate(review_count=Count('activity_reviews', distinct=True))
-
-    # ✅ สถานะติดตาม (เชื่อมกับ Profile.followers)
-    if request.user.is_authenticated:
-        my_profile = getattr(request.user, "profile", None)
-        if my_profile:
-            follow_qs = Profile.objects.filter(
-                user_id=OuterRef('organizer_id'),
-                followers=my_profile
-            )
-            posts = posts.annotate(is_following=Exists(follow_qs))
-        else:
-            posts = posts.annotate(is_following=Value(False, output_field=BooleanField()))
-    else:
-        posts = posts.annotate(is_following=Value(False, output_field=BooleanField()))
-
-    categories = [c[0] for c in Post.CATEGORY_CHOICES]
-
     selected_category = request.GET.get('category')
     search_query = request.GET.get('search', '').strip()
 
-    is_scored = False  # ✅ ตัวแปรเช็คว่ามีการให้คะแนนเพื่อจัดเรียงหรือไม่
-
     if selected_category:
         posts = posts.filter(category=selected_category)
 
     if search_query:
         tokens = _normalize_search_query(search_query)
 
-        # Build Q for tokens: match any token in several text fields
-        q = Q()
-        for t in tokens:
-            token_q = (
-                Q(title__icontains=t) |
-                Q(description__icontains=t) |
-                Q(location__icontains=t) |
-                Q(organizer__first_name__icontains=t) |
-                Q(organizer__last_name__icontains=t) |
-                Q(organizer__email__icontains=t)
-            )
-            if t.isdigit() and len(t) == 4:
-                try:
-                    yi = int(t)
-                    token_q |= Q(event_date__year=yi)
-                except Exception:
-                    pass
-            q |= token_q
-
-        posts = posts.filter(q).distinct()
-
-        # Annotate relevance score using weighted matches
-        if hasattr(posts, 'annotate') and tokens:
-            from django.db.models import Case, When, IntegerField
-            
-            phrase = search_query.strip()
-            token_exprs = []
-
-            # --- 1. คะแนนพิเศษสูงสุด (10000) ใช้ icontains ทั้งหมด ---
-            if '@' in phrase:
-                token_exprs.append(Case(When(Q(organizer__email__icontains=phrase), then=Value(10000)), default=Value(0), output_field=IntegerField()))
-            
-            parts = phrase.split()
-            if len(parts) >= 2:
-                first = parts[0]
-                last = parts[-1]
-                name_cond = (
-                    Q(organizer__first_name__icontains=first) & Q(organizer__last_name__icontains=last)
-                ) | (
-                    Q(organizer__first_name__icontains=last) & Q(organizer__last_name__icontains=first)
-                )
-                token_exprs.append(Case(When(name_cond, then=Value(10000)), default=Value(0), output_field=IntegerField()))
-            elif len(parts) == 1:
-                # กรณีค้นหาคำเดียว ขอแค่มีส่วนหนึ่งของชื่อหรือนามสกุลตรง ก็ให้คะแนนเต็ม
-                exact_name_cond = Q(organizer__first_name__icontains=phrase) | Q(organizer__last_name__icontains=phrase)
-                token_exprs.append(Case(When(exact_name_cond, then=Value(10000)), default=Value(0), output_field=IntegerField()))
-
-            # --- 2. คะแนนระดับย่อยตาม Token (คำที่ถูกตัดแยก) ---
-            for t in tokens:
-                token_exprs.append(
-                    Case(
-                        When(Q(organizer__email__icontains=t), then=Value(50)),
-                        When(Q(organizer__first_name__icontains=t) | Q(organizer__last_name__icontains=t), then=Value(40)),
-                        When(Q(title__icontains=t), then=Value(10)),
-                        When(Q(description__icontains=t), then=Value(5)),
-                        When(Q(location__icontains=t), then=Value(3)),
-                        default=Value(0),
-                        output_field=IntegerField(),
-                    )
-                )
-
-                if t.isdigit() and len(t) == 4:
-                    try:
-                        yi = int(t)
-                        token_exprs.append(Case(When(Q(event_date__year=yi), then=Value(10)), default=Value(0), output_field=IntegerField()))
-                    except Exception:
-                        pass
-
-            # --- 3. นำคะแนนมารวมกันและเรียงลำดับ (Order By Score) ---
-            if token_exprs:
-                score_expr = token_exprs[0]
-                for expr in token_exprs[1:]:
-                    score_expr = score_expr + expr
-                
-                # เรียงคะแนนจากมากไปน้อย (ถ้าคะแนนเท่ากันเรียงตามวันที่)
-                posts = posts.annotate(score=score_expr).order_by('-score', '-created_at')
-                is_scored = True  # ✅ มาร์คไว้ว่าจัดเรียงด้วยคะแนนแล้ว
-
-        # If no DB hits, try a lightweight fuzzy match in Python
-        if hasattr(posts, 'exists') and not posts.exists():
-            candidates = Post.objects.filter(
-                status=Post.Status.APPROVED,
-                is_hidden=False,
-                is_deleted=False,
-            ).order_by('-created_at')[:300]
-
-            def best_score(p):
-                hay = ' '.join(filter(None, [p.title or '', p.description or '', p.location or '',
-                                             (p.organizer.first_name or '') + ' ' + (p.organizer.last_name or '')]))
-                hay_low = hay.lower()
-                best = 0.0
-                for t in tokens:
-                    try:
-                        score = difflib.SequenceMatcher(None, t.lower(), hay_low).ratio()
-                        if score > best:
-                            best = score
-                    except Exception:
-                        continue
-                return best
-
-            matched = []
-            for p in candidates:
-                try:
-                    sc = best_score(p)
-                    if sc >= 0.45:  # tolerant threshold
-                        matched.append((sc, p))
-                except Exception:
-                    continue
-
-            matched.sort(key=lambda x: x[0], reverse=True)
-            posts = [m[1] for m in matched]
-
-    # ✅ ป้องกันการเรียงลำดับทับคะแนนที่เราตั้งไว้ (ถ้ายังไม่มีการเรียงด้วยคะแนน ให้เรียงตามเวลา)
-    if hasattr(posts, 'order_by'):
-        if not is_scored:
-            posts = posts.order_by('-created_at')
+        def _compute_ranked():
+            # ✅ คะแนนความเกี่ยวข้องมาจากน้ำหนักฟิลด์ที่คำนวณไว้ในดัชนี (search.ranking)
+            #    แล้วเรียง (score, created_at) ฝั่ง Python แทน Case/When หลายสิบเงื่อนไขบนทุกแถว
+            ranked = rank_post_keys(posts, score_posts(tokens, search_query))
+
+            # ไม่พบผลตรงตัว -> ค้นแบบทนคำพิมพ์ผิดจากดัชนี trigram (ครอบคลุมทุกโพสต์ ไม่ใช่แค่ 300 โพสต์ล่าสุด)
+            if not ranked:
+                ranked = rank_post_keys(posts, fuzzy_scores(tokens, posts))
+            return ranked
+
+        # ✅ คำค้นยอดนิยม (หมวดหมู่ จังหวัด ชื่อเดือน) ไม่ต้องค้น/เรียงใหม่ทุก request
+        #    cache ตามชุดคำค้น + หมวดหมู่ และหมดอายุเมื่อโพสต์เปลี่ยน (feed version)
+        ranked_keys = feed_cache.cached_search_keys(
+            selected_category, tokens, search_query, _compute_ranked
+        )
+
+        # ✅ แบ่งหน้าด้วยคีย์ (score, created_at, id) แล้วดึงเฉพาะโพสต์ของหน้านี้
+        page_ids, next_cursor = ranked_page(ranked_keys, cursor)
     else:
-        # list of Post instances -> sort in-place by created_at desc (สำหรับกรณี fuzzy match)
-        posts.sort(key=lambda p: getattr(p, 'created_at', datetime.datetime.min), reverse=True)
+        # ✅ id ของหน้า feed ไม่ขึ้นกับผู้ดู -> cache ร่วมกันต่อหมวดหมู่ + cursor
+        def _compute_page():
+            page, next_cursor = keyset_page(posts.only('id', 'created_at'), cursor)
+            return [p.pk for p in page], next_cursor
 
-    # compute show_register for each post (hide when closed, full, or within 1 day of event)
-    posts = list(posts)
-    now = timezone.now()
-    for p in posts:
-        try:
-            within_cutoff = False
-            if p.event_date:
-                within_cutoff = now <= (p.event_date - timezone.timedelta(days=1))
-            else:
-                within_cutoff = True
+        page_ids, next_cursor = feed_cache.cached_page_ids(selected_category, cursor, _compute_page)
 
-            p.show_register = bool(p.allow_register and within_cutoff and (not p.is_full()))
-        except Exception:
-            p.show_register = bool(p.allow_register)
+    posts_by_id = posts.select_related('organizer').in_bulk(page_ids)
+    page = [posts_by_id[pk] for pk in page_ids if pk in posts_by_id]
+
+    # ✅ ส่วนที่ใช้ร่วมกันมาจาก cache, สถานะถูกใจ/จัดเก็บ/ติดตามมาจาก overlay ของผู้ดู
+    feed_cache.attach_shared_cards(page)
+    feed_cache.apply_viewer_state(page, request.user)
+    _mark_show_register(page)
+    return page, next_cursor
+
+
+def home_view(request):
+    """
+    หน้า feed หลัก
+    - รองรับการกรองตามหมวดหมู่ (category)
+    - รองรับการค้นหา (search) ตามชื่อกิจกรรม / รายละเอียด / สถานที่ / ชื่อผู้จัด
+    - render หน้าแรกจาก server หน้าถัดไปโหลดผ่าน home_feed_api ตอนเลื่อนลง
+    """
+    posts, next_cursor = _home_feed_page(request)
 
     context = {
         'posts': posts,
-        'categories': categories,
-        'selected_category': selected_category,
-        'search_query': search_query,
+        'next_cursor': next_cursor,
+        'categories': [c[0] for c in Post.CATEGORY_CHOICES],
+        'selected_category': request.GET.get('category'),
+        'search_query': request.GET.get('search', '').strip(),
     }
     return render(request, 'home/homes.html', context)
 
 
-def category_view(request):
-    category_type = request.GET.get('type')
+@require_GET
+def home_feed_api(request):
+    """
+    JSON สำหรับ infinite scroll ของหน้า feed หลัก
+    Query params: category, search (เหมือนหน้า feed), cursor (จาก next_cursor ของหน้าก่อน)
+    Returns: {html: การ์ดโพสต์ของหน้านี้, next_cursor: str | null}
+    """
+    posts, next_cursor = _home_feed_page(request, request.GET.get('cursor'))
+    html = render_to_string('home/_feed_page.html', {'posts': posts}, request=request)
+    return JsonResponse({'html': html, 'next_cursor': next_cursor})
 
+
+def _category_feed_page(request, cursor=None):
     posts = Post.objects.filter(
         status=Post.Status.APPROVED,
         is_hidden=False,
         is_deleted=False,
     )
 
-    # ✅ จำนวนรีวิวต่อโพสต์
-    posts = posts.annotate(review_count=Count('activity_reviews', distinct=True))
+    category_type = request.GET.get('type')
+    if category_type:
+        posts = posts.filter(category=category_type)
 
-    # ✅ สถานะติดตาม
-    if request.user.is_authenticated:
-        my_profile = getattr(request.user, "profile", None)
-        if my_profile:
-            follow_qs = Profile.objects.filter(
-                user_id=OuterRef('organizer_id'),
-                followers=my_profile
-            )
-            posts = posts.annotate(is_following=Exists(follow_qs))
-        else:
-            posts = posts.annotate(is_following=Value(False, output_field=BooleanField()))
-    else:
-        posts = posts.annotate(is_following=Value(False, output_field=BooleanField()))
+    # ✅ ค้นหาภายในหมวดหมู่ ผ่านดัชนีค้นหาเดียวกับหน้า feed
+    search_query = request.GET.get('search', '').strip()
+    if search_query:
+        posts = posts.filter(id__in=matching_post_ids(_normalize_search_query(search_query)))
 
-    posts = posts.order_by('-created_at')
+    return keyset_page(posts.select_related('organizer'), cursor)
 
-    if category_type:
-        posts = posts.filter(category=category_type)
+
+def category_view(request):
+    posts, next_cursor = _category_feed_page(request)
 
     context = {
         'posts': posts,
-        'selected_category': category_type,
+        'next_cursor': next_cursor,
+        'selected_category': request.GET.get('type'),
+        'search_query': request.GET.get('search', '').strip(),
     }
     return render(request, 'home/category.html', context)
 
 
+@require_GET
+def category_feed_api(request):
+    """JSON สำหรับ infinite scroll ของหน้าหมวดหมู่ (params: type, search, cursor)"""
+    posts, next_cursor = _category_feed_page(request, request.GET.get('cursor'))
+    html = render_to_string('home/_category_page.html', {'posts': posts}, request=request)
+    return JsonResponse({'html': html, 'next_cursor': next_cursor})
+
+
 @login_required
 def post_detail_view(request, post_id):
     """
@@ -436,50 +293,142 @@ def post_detail_view(request, post_id):
     return render(request, 'home/post_detail.html', context)
 
 
-def _get_events_from_posts():
-    posts = Post.objects.filter(
-        status=Post.Status.APPROVED,
-        is_hidden=False,
-        is_deleted=False,
-        map_lat__isnull=False,
-        map_lng__isnull=False,
-    )
+# จำนวนหมุดสูงสุดต่อการเรียก map_events_api หนึ่งครั้ง
+MAP_EVENTS_LIMIT = 500
 
-    events = []
-    for p in posts:
-        try:
-            lat = float(p.map_lat)
-            lng = float(p.map_lng)
-        except (TypeError, ValueError):
-            continue
-
-        events.append({
-            "id": p.id,
-            "title": p.title,
-            "lat": lat,
-            "lng": lng,
-            "location": p.location or "",
-            "date": p.event_date.strftime("%d %b %Y") if p.event_date else "",
-        })
-    return events
 
+def _map_payload(bbox, zoom, filters):
+    """หมุด (หรือกลุ่มหมุดเมื่อซูมออก) ในกรอบ bbox: {events, clusters, truncated}"""
+    # ✅ ซูมออก: ส่งกลุ่มหมุดที่คำนวณไว้ล่วงหน้าต่อระดับซูม ขนาด payload ไม่โตตามจำนวนโพสต์
+    if zoom is not None and zoom < map_clusters.CLUSTER_MAX_ZOOM:
+        return {
+            'events': [],
+            'clusters': map_clusters.clusters_in_bbox(bbox, zoom, filters),
+            'truncated': False,
+        }
+
+    # ✅ ค้นผ่าน index (สถานะ, map_cell, event_date) แทนการโหลดทุกโพสต์ที่มีพิกัด
+    rows = list(geo.map_posts(filters).filter(geo.bbox_q(bbox)).order_by('-created_at')[:MAP_EVENTS_LIMIT + 1])
+    return {
+        'events': [geo.event_dict(p) for p in rows[:MAP_EVENTS_LIMIT]],
+        'clusters': [],
+        'truncated': len(rows) > MAP_EVENTS_LIMIT,
+    }
+
+
+@require_GET
+def map_events_api(request):
+    """
+    หมุดกิจกรรมเฉพาะในกรอบแผนที่ที่ผู้ใช้มองอยู่
+    Query params: bbox=west,south,east,north (จาก map.getBounds().toBBoxString()), zoom,
+                  from / to (YYYY-MM-DD ช่วงวันที่จัด), category
+    Returns: {events: [...], clusters: [{lat, lng, count}], truncated: bool}
+    - zoom < CLUSTER_MAX_ZOOM -> คืนเฉพาะ clusters (จำนวน + จุดกึ่งกลาง) ไม่ส่งหมุดรายโพสต์
+    - ไม่ระบุ zoom หรือซูมเข้าใกล้ -> คืน events ของโพสต์ในกรอบ
+    """
+    bbox = geo.parse_bbox(request.GET.get('bbox'))
+    if bbox is None:
+        return JsonResponse({'error': 'invalid bbox'}, status=400)
+    try:
+        zoom = int(request.GET['zoom']) if request.GET.get('zoom') else None
+        filters = geo.parse_filters(request.GET)
+    except ValueError:
+        return JsonResponse({'error': 'invalid zoom/from/to'}, status=400)
+
+    def _compute():
+        return _map_payload(bbox, zoom, filters)
+
+    # ✅ JSON ที่ serialize แล้ว cache ร่วมกันต่อ posts version + ETag/304
+    params = {'bbox': bbox, 'zoom': zoom, **filters}
+    return map_events.json_response(request, 'events', params, _compute)
 
-def public_map_view(request):
-    events = _get_events_from_posts()
 
+# ซูมสูงสุดของ tile ที่ให้บริการ (เท่ากับ maxZoom ของแผนที่)
+MAP_TILE_MAX_ZOOM = 19
+
+
+@require_GET
+def map_tile_api(request, z, x, y):
+    """
+    หมุดกิจกรรมของ tile z/x/y ในรูปแบบ binary (ดู home.map_tiles) — เล็กกว่า JSON มาก
+    ซูมต่ำกว่า CLUSTER_MAX_ZOOM ได้กลุ่มหมุด, ซูมสูงกว่านั้นได้หมุดรายโพสต์
+    Query params (ไม่บังคับ): from / to (YYYY-MM-DD), category
+    """
+    if z > MAP_TILE_MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+        raise Http404("invalid tile")
+    try:
+        filters = geo.parse_filters(request.GET)
+    except ValueError:
+        return JsonResponse({'error': 'invalid from/to'}, status=400)
+
+    def _body():
+        payload = _map_payload(map_tiles.tile_bbox(z, x, y), z, filters)
+        if z < map_clusters.CLUSTER_MAX_ZOOM:
+            return map_tiles.encode_clusters(payload['clusters'])
+        return map_tiles.encode_events(payload['events'], truncated=payload['truncated'])
+
+    return map_events.cached_response(
+        request, 'tile', {'z': z, 'x': x, 'y': y, **filters}, _body, map_tiles.CONTENT_TYPE
+    )
+
+
+def public_map_view(request):
+    # หมุดโหลดตามกรอบแผนที่ผ่าน map_events_api (ไม่ฝังทุกโพสต์ลงในหน้า)
     context = {
-        "events_json": json.dumps(events, cls=DjangoJSONEncoder, ensure_ascii=False),
         "enable_geolocation": False,
+        "categories": [c[0] for c in Post.CATEGORY_CHOICES],
     }
     return render(request, "home/map.html", context)
 
 
+# รัศมีเริ่มต้น / สูงสุด และจำนวนผลสูงสุดของการค้นกิจกรรมใกล้ตัว
+NEARBY_RADIUS_KM = 30
+NEARBY_MAX_RADIUS_KM = 200
+NEARBY_LIMIT = 100
+
+
 @login_required
 def nearby_map_view(request):
-    events = _get_events_from_posts()
-
+    # กิจกรรมในรัศมีโหลดผ่าน map_nearby_events_api เมื่อรู้ตำแหน่งผู้ใช้แล้ว
     context = {
-        "events_json": json.dumps(events, cls=DjangoJSONEncoder, ensure_ascii=False),
-        "radius_km": 30,
+        "radius_km": NEARBY_RADIUS_KM,
     }
-    return render(request, "home/map_nearby.html", context)
\ No newline at end of file
+    return render(request, "home/map_nearby.html", context)
+
+
+@login_required
+@require_GET
+def map_nearby_events_api(request):
+    """
+    กิจกรรมในรัศมีรอบตำแหน่งผู้ใช้ เรียงจากใกล้ไปไกล
+    Query params: lat, lng, radius (กม. ค่าเริ่มต้น 30), limit, from / to (YYYY-MM-DD), category
+    Returns: {events: [... + distance_km], radius_km}
+    """
+    coords = geo.to_coords(request.GET.get('lat'), request.GET.get('lng'))
+    if coords is None:
+        return JsonResponse({'error': 'invalid lat/lng'}, status=400)
+    try:
+        radius = float(request.GET.get('radius', NEARBY_RADIUS_KM))
+        limit = int(request.GET.get('limit', NEARBY_LIMIT))
+        filters = geo.parse_filters(request.GET)
+    except ValueError:
+        return JsonResponse({'error': 'invalid radius/limit/from/to'}, status=400)
+    # nan ผ่าน min/max ได้ (เทียบกับ nan เป็นเท็จเสมอ) — lat/lng ถูกตัดใน geo.to_coords แล้ว
+    if not math.isfinite(radius):
+        return JsonResponse({'error': 'invalid radius/limit/from/to'}, status=400)
+    radius = min(max(radius, 0.1), NEARBY_MAX_RADIUS_KM)
+    limit = min(max(limit, 1), NEARBY_LIMIT)
+    # ปัดพิกัดเหลือ ~10 เมตร ให้ตำแหน่งเดิมใช้ cache/ETag เดียวกัน
+    lat, lng = round(coords[0], 4), round(coords[1], 4)
+
+    def _compute():
+        # ✅ กรองด้วยกรอบรอบรัศมีผ่าน index ของ map_cell แล้วคำนวณ haversine เฉพาะโพสต์ในกรอบ
+        events = []
+        for distance, post in geo.nearby(geo.map_posts(filters), lat, lng, radius, limit):
+            ev = geo.event_dict(post)
+            ev['distance_km'] = round(distance, 2)
+            events.append(ev)
+        return {'events': events, 'radius_km': radius}
+
+    params = {'lat': lat, 'lng': lng, 'radius': radius, 'limit': limit, **filters}
+    return map_events.json_response(request, 'nearby', params, _compute)
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""
+ตัวนับข้อความแชทที่ยังไม่อ่านต่อ (ผู้ใช้, ห้อง) — ChatUnread
+
+- ข้อความใหม่: INSERT IGNORE แถวของสมาชิกที่ยังไม่มี แล้ว UPDATE +1 ทั้งห้องใน statement เดียว
+  (ทำตามลำดับนี้จึงไม่มีการนับหายเมื่อมีข้อความเข้ามาพร้อมกัน) ต้นทุน O(สมาชิก) ต่อข้อความ ไม่สร้างแถวใหม่
+- เปิดห้อง/อ่านแล้ว: UPDATE แถวเดียวด้วย (user, room)
+"""
+from django.db.models import F
+from django.utils import timezone
+
+from .fanout import FANOUT_BATCH_SIZE
+from .models import ChatUnread
+from . import unread
+
+
+def bump(room_id, member_ids, sender_id, *, title, message, link_url):
+    """
+    เพิ่มตัวนับของสมาชิกทุกคนในห้อง (ยกเว้นผู้ส่ง) และเก็บตัวอย่างข้อความล่าสุด
+    คืน list ของ ChatUnread หลังอัปเดต (ใช้ส่ง push)
+    """
+    recipients = sorted({uid for uid in member_ids if uid is not None} - {sender_id})
+    if not recipients:
+        return []
+
+    ChatUnread.objects.bulk_create(
+        [ChatUnread(user_id=uid, room_id=room_id) for uid in recipients],
+        batch_size=FANOUT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    counters = ChatUnread.objects.filter(room_id=room_id, user_id__in=recipients)
+    counters.update(
+        unread_count=F("unread_count") + 1,
+        last_sender_id=sender_id,
+        title=title[:255],
+        last_message=message[:255],
+        link_url=link_url,
+        updated_at=timezone.now(),
+    )
+    unread.invalidate(recipients)
+    return list(counters)
+
+
+def mark_room_read(user_pk, room_id):
+    """ทำเครื่องหมายว่าอ่านห้องนี้แล้ว (แถวเดียว) คืน True ถ้ามีข้อความค้างอ่านอยู่"""
+    changed = ChatUnread.objects.filter(user_id=user_pk, room_id=room_id, unread_count__gt=0).update(unread_count=0)
+    if changed:
+        unread.invalidate([user_pk])
+    return bool(changed)
+
+
+def counts_by_room(user_pk, room_ids):
+    """{room_id: จำนวนข้อความที่ยังไม่อ่าน} ของห้องที่ระบุ (query เดียว)"""
+    return dict(
+        ChatUnread.objects.filter(user_id=user_pk, room_id__in=room_ids, unread_count__gt=0)
+        .values_list("room_id", "unread_count")
+    )
@@ -1,6 +1,8 @@
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from .push import group_name
+
 
 class NotificationsConsumer(AsyncWebsocketConsumer):
     async def connect(self):
@@ -9,7 +11,7 @@ class NotificationsConsumer(AsyncWebsocketConsumer):
             await self.close()
             return
 
-        self.user_group_name = f"notif_{user.id}"
+        self.user_group_name = group_name(user.pk)
 
         await self.channel_layer.group_add(self.user_group_name, self.channel_name)
         await self.accept()
@@ -22,5 +24,12 @@ class NotificationsConsumer(AsyncWebsocketConsumer):
 
     async def notify(self, event):
         # event should contain 'payload' key
+        # แจ้งเตือนหลายรายการของผู้ใช้คนเดียวกันถูกรวมมาเป็น event เดียว (count / chat_count / items)
         payload = event.get('payload') or {}
-        await self.send(text_data=json.dumps({"type": "notification", "payload": payload}))
+        await self.send(text_data=json.dumps({
+            "type": "notification",
+            "payload": payload,
+            "items": event.get('items') or [payload],
+            "count": event.get('count', 1),
+            "chat_count": event.get('chat_count', 1 if payload.get('kind') == 'CHAT_MESSAGE' else 0),
+        }))
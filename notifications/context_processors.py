@@ -5,17 +5,25 @@ def unread_counts(request) -> Dict:
     """Provide unread notification counts for templates.
 
     Returns:
-        dict with keys `unread_notifications` and `unread_chat_count` (ints).
+        dict with keys `unread_notifications` and `unread_chat_count`.
+        Both are callables (the template engine calls them on use), so pages
+        that never show a badge do not touch the cache or the database.
     """
-    if not getattr(request, 'user', None) or not request.user.is_authenticated:
-        return {'unread_notifications': 0, 'unread_chat_count': 0}
+    loaded = {}
 
-    try:
-        from .models import Notification
-        unread = Notification.objects.filter(user=request.user, is_read=False).count()
-        unread_chat = Notification.objects.filter(
-            user=request.user, is_read=False, kind=Notification.Kind.CHAT_MESSAGE
-        ).count()
-        return {'unread_notifications': unread, 'unread_chat_count': unread_chat}
-    except Exception:
-        return {'unread_notifications': 0, 'unread_chat_count': 0}
+    def counts():
+        if "counts" not in loaded:
+            loaded["counts"] = (0, 0)
+            try:
+                user = getattr(request, 'user', None)
+                if user and user.is_authenticated:
+                    from .unread import counts_for
+                    loaded["counts"] = counts_for(user.pk)
+            except Exception:
+                pass
+        return loaded["counts"]
+
+    return {
+        'unread_notifications': lambda: counts()[0],
+        'unread_chat_count': lambda: counts()[1],
+    }
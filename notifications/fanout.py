@@ -0,0 +1,51 @@
+"""
+fan-out ของการแจ้งเตือน: สร้าง Notification ให้ผู้รับหลายคนด้วย bulk_create เป็นชุดๆ
+แทนการวน get_or_create / create ทีละคน (SELECT + INSERT ต่อผู้รับ)
+"""
+from itertools import islice
+
+from .models import Notification
+from . import unread
+
+# จำนวนแถวต่อหนึ่ง INSERT
+FANOUT_BATCH_SIZE = 500
+
+
+def _chunks(items, size):
+    it = iter(items)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def fan_out(user_ids, kind, *, message, title="", link_url="", post=None, trigger_date=None, exclude=()):
+    """
+    สร้าง Notification ชนิด `kind` ให้ผู้ใช้ทุกคนใน `user_ids` (ตัดซ้ำ / ตัด `exclude` / ตัด None ออก)
+    คืน list ของ Notification ที่ถูกส่งเข้า INSERT
+
+    - มี trigger_date: ใช้ ignore_conflicts กับ uniq_user_kind_post_triggerdate
+      แถวที่มีอยู่แล้วถูกข้าม (เหมือน get_or_create เดิม — ไม่แก้ข้อความของแถวเดิม)
+      และ object ที่คืนจะไม่มี pk
+    - ไม่มี trigger_date (เช่นแชท / แอดมิน): แจ้งทุกครั้ง object มี pk ถ้าฐานข้อมูลคืน id จาก bulk insert ได้
+    """
+    skip = set(exclude)
+    recipients = sorted({uid for uid in user_ids if uid is not None} - skip)
+    ignore_conflicts = trigger_date is not None
+
+    created = []
+    for chunk in _chunks(recipients, FANOUT_BATCH_SIZE):
+        rows = [
+            Notification(
+                user_id=uid,
+                post=post,
+                kind=kind,
+                trigger_date=trigger_date,
+                title=title,
+                message=message,
+                link_url=link_url,
+            )
+            for uid in chunk
+        ]
+        Notification.objects.bulk_create(rows, ignore_conflicts=ignore_conflicts)
+        created.extend(rows)
+    unread.invalidate(recipients)
+    return created
@@ -0,0 +1,26 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications.reminders import materialize_reminders
+
+
+class Command(BaseCommand):
+    help = "สร้างแจ้งเตือนก่อนวันกิจกรรม (3 วัน / 1 วัน) ของผู้ใช้ทุกคนที่ถึงกำหนดวันนี้ — ตั้ง cron ให้รันวันละครั้ง"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            help="วันที่ที่ต้องการสร้างแจ้งเตือน (YYYY-MM-DD) เช่นรันย้อนหลังวันที่ cron ไม่ได้รัน",
+        )
+
+    def handle(self, *args, **options):
+        today = None
+        if options["date"]:
+            try:
+                today = datetime.date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError("รูปแบบวันที่ต้องเป็น YYYY-MM-DD")
+
+        created = materialize_reminders(today)
+        self.stdout.write(self.style.SUCCESS(f"สร้างแจ้งเตือนล่วงหน้าแล้ว {created} รายการ"))
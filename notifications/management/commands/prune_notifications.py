@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications import retention
+
+
+class Command(BaseCommand):
+    help = "ยุบแจ้งเตือนแชทเหลือแถวเดียวต่อห้อง และลบ (หรือ archive) แจ้งเตือนที่อ่านแล้วซึ่งเก่ากว่าที่กำหนด เป็นชุดๆ"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=getattr(settings, "NOTIFICATION_RETENTION_DAYS", retention.RETENTION_DAYS),
+            help="เก็บแจ้งเตือนที่อ่านแล้ว/งาน outbox ที่เสร็จแล้วไว้กี่วัน",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=retention.BATCH_SIZE,
+            help="จำนวนแถวที่ลบต่อรอบ",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.5,
+            help="วินาทีที่พักระหว่างแต่ละรอบ (ลดภาระฐานข้อมูลขณะมีผู้ใช้งาน)",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            default=getattr(settings, "NOTIFICATION_ARCHIVE_DIR", None),
+            help="โฟลเดอร์สำหรับเก็บแจ้งเตือนที่ลบเป็นไฟล์ .jsonl.gz (ไม่ระบุ = ลบอย่างเดียว)",
+        )
+        parser.add_argument(
+            "--no-compact",
+            action="store_true",
+            help="ไม่ต้องยุบแจ้งเตือนแชท",
+        )
+
+    def handle(self, *args, **options):
+        batch = dict(batch_size=max(1, options["batch_size"]), pause=max(0.0, options["sleep"]))
+
+        if not options["no_compact"]:
+            compacted = retention.compact_chat_notifications(**batch)
+            self.stdout.write(f"ยุบแจ้งเตือนแชทแล้ว {compacted} แถว")
+
+        pruned = retention.prune_read_notifications(
+            days=options["days"], archive_dir=options["archive_dir"], **batch
+        )
+        jobs = retention.prune_finished_jobs(days=options["days"], **batch)
+        self.stdout.write(self.style.SUCCESS(
+            f"ลบแจ้งเตือนที่อ่านแล้ว {pruned} แถว และงาน outbox ที่เสร็จแล้ว {jobs} งาน (เก่ากว่า {options['days']} วัน)"
+        ))
@@ -0,0 +1,81 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+
+from notifications import outbox, push
+
+# คืนงานที่ค้าง (worker ตาย) ทุกๆ กี่วินาที
+REQUEUE_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = "ทำงานแจ้งเตือนที่รอใน outbox (fan-out + push realtime) ด้วย thread pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="จำนวน thread ที่ทำงานพร้อมกัน",
+        )
+        parser.add_argument(
+            "--max-in-flight",
+            type=int,
+            default=None,
+            help="จำนวนงานที่จองไว้ได้พร้อมกันสูงสุด (ค่าเริ่มต้น = workers x 2) งานที่เกินรอในตาราง",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="วินาทีที่รอก่อนเช็คงานใหม่เมื่อไม่มีงาน",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="ทำงานที่ถึงเวลาจนหมดแล้วจบ (สำหรับ cron)",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        max_in_flight = max(1, options["max_in_flight"] or workers * 2)
+        poll = max(0.1, options["poll_interval"])
+        once = options["once"]
+
+        done = failed = 0
+        in_flight = set()
+        last_requeue = 0.0
+
+        # push realtime จากทุก thread ถูกสะสมแล้วส่งเป็นชุด (ดู notifications.push)
+        push.dispatcher.start()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="notif-worker") as pool:
+            try:
+                while True:
+                    if time.monotonic() - last_requeue >= REQUEUE_INTERVAL:
+                        outbox.requeue_stale()
+                        last_requeue = time.monotonic()
+
+                    # back-pressure: จองเพิ่มเท่าที่ยังมีช่องว่าง
+                    jobs = outbox.claim(max_in_flight - len(in_flight))
+                    for job in jobs:
+                        in_flight.add(pool.submit(outbox.run_job, job))
+
+                    if not in_flight:
+                        if once:
+                            break
+                        time.sleep(poll)
+                        continue
+
+                    finished, in_flight = wait(in_flight, timeout=poll, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        if future.result():
+                            done += 1
+                        else:
+                            failed += 1
+            except KeyboardInterrupt:
+                # ให้งานที่จองไว้ทำให้เสร็จก่อนออก (ไม่งั้นจะค้าง RUNNING จนครบ LOCK_TIMEOUT)
+                wait(in_flight)
+        push.dispatcher.stop()
+
+        self.stdout.write(self.style.SUCCESS(f"ทำงานแจ้งเตือนสำเร็จ {done} งาน ล้มเหลว {failed} งาน"))
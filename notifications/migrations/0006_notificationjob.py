@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:57
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_alter_notification_kind'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(max_length=50)),
+                ('payload', models.JSONField(default=dict)),
+                ('idempotency_key', models.CharField(max_length=191, unique=True)),
+                ('status', models.CharField(choices=[('PENDING', 'รอดำเนินการ'), ('RUNNING', 'กำลังดำเนินการ'), ('DONE', 'สำเร็จ'), ('FAILED', 'ล้มเหลว')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_after'], name='notif_job_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_chat_unread(apps, schema_editor):
+    """
+    ตัวนับเริ่มต้นของแต่ละ (สมาชิก, ห้อง) = ข้อความที่ยังไม่อ่านในห้องที่คนอื่นส่ง
+    และปิดแจ้งเตือนแชทแบบเดิมที่ยังไม่อ่าน (ถูกแทนด้วยตัวนับแล้ว)
+    """
+    ChatMembership = apps.get_model("chat", "ChatMembership")
+    ChatMessage = apps.get_model("chat", "ChatMessage")
+    ChatUnread = apps.get_model("notifications", "ChatUnread")
+    Notification = apps.get_model("notifications", "Notification")
+
+    # unread[room_id][sender_id] = จำนวนข้อความที่ยังไม่อ่าน
+    unread = {}
+    rows = (
+        ChatMessage.objects.filter(is_read=False)
+        .values("room_id", "sender_id")
+        .annotate(n=models.Count("id"))
+    )
+    for row in rows:
+        unread.setdefault(row["room_id"], {})[row["sender_id"]] = row["n"]
+
+    counters = []
+    members = ChatMembership.objects.filter(room_id__in=list(unread)).values_list("room_id", "user_id")
+    for room_id, user_id in members.iterator():
+        by_sender = unread[room_id]
+        n = sum(by_sender.values()) - by_sender.get(user_id, 0)
+        if n > 0:
+            counters.append(ChatUnread(user_id=user_id, room_id=room_id, unread_count=n))
+    ChatUnread.objects.bulk_create(counters, batch_size=500)
+
+    Notification.objects.filter(kind="CHAT_MESSAGE", is_read=False).update(is_read=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_initial'),
+        ('notifications', '0007_notification_inbox_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatUnread',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('title', models.CharField(blank=True, default='', max_length=255)),
+                ('last_message', models.CharField(blank=True, default='', max_length=255)),
+                ('link_url', models.CharField(blank=True, default='', max_length=255)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_sender', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unread_counters', to='chat.chatroom')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_unreads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'room'), name='uniq_chat_unread_user_room')],
+            },
+        ),
+        migrations.RunPython(fill_chat_unread, migrations.RunPython.noop),
+    ]
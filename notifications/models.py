@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from post.models import Post
 
 
@@ -50,6 +51,86 @@ class Notification(models.Model):
                 name="uniq_user_kind_post_triggerdate",
             )
         ]
+        indexes = [
+            # ✅ กล่องแจ้งเตือน: WHERE user = ? ORDER BY created_at DESC LIMIT 30 (อ่านตาม index ไม่ต้อง sort)
+            models.Index(fields=["user", "-created_at"], name="notif_user_created_idx"),
+            # ✅ ตัวนับ unread (ทั้งหมด / แชท + trigger_date) ครอบคลุมใน index เดียว ไม่ต้องอ่านแถวจริง
+            #    และเส้นทาง mark-read ของแชท (user, is_read=False, kind=CHAT_MESSAGE แล้วกรอง link_url ต่อ)
+            models.Index(fields=["user", "is_read", "kind", "trigger_date"], name="notif_user_unread_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user_id} - {self.kind} - {self.title}"
+
+
+class NotificationJob(models.Model):
+    """
+    งานแจ้งเตือนที่รอทำนอก request (outbox) — ดู notifications.outbox
+    worker: python manage.py run_notification_worker
+    """
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "รอดำเนินการ"
+        RUNNING = "RUNNING", "กำลังดำเนินการ"
+        DONE = "DONE", "สำเร็จ"
+        FAILED = "FAILED", "ล้มเหลว"
+
+    task = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    # กันงานซ้ำจากเหตุการณ์เดียวกัน (INSERT ซ้ำด้วยคีย์เดิมจะถูกข้าม) — 191 ตัวอักษรเพื่อให้ทำ index บน MySQL utf8mb4 ได้
+    idempotency_key = models.CharField(max_length=191, unique=True)
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)  # เวลาที่ทำได้เร็วที่สุด (เลื่อนออกไปเมื่อ retry)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # ✅ worker หยิบงานที่ถึงเวลา: WHERE status = 'PENDING' AND run_after <= now ORDER BY run_after
+            models.Index(fields=["status", "run_after"], name="notif_job_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task} [{self.status}] {self.idempotency_key}"
+
+
+class ChatUnread(models.Model):
+    """
+    จำนวนข้อความแชทที่ยังไม่อ่านต่อ (ผู้ใช้, ห้อง) พร้อมตัวอย่างข้อความล่าสุด
+    แทนการสร้าง Notification หนึ่งแถวต่อสมาชิกต่อข้อความ — ดู notifications.chat_unread
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="chat_unreads",
+    )
+    room = models.ForeignKey(
+        "chat.ChatRoom",
+        on_delete=models.CASCADE,
+        related_name="unread_counters",
+    )
+    unread_count = models.PositiveIntegerField(default=0)
+
+    last_sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    title = models.CharField(max_length=255, blank=True, default="")
+    last_message = models.CharField(max_length=255, blank=True, default="")
+    link_url = models.CharField(max_length=255, blank=True, default="")
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "room"], name="uniq_chat_unread_user_room"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - room {self.room_id}: {self.unread_count}"
@@ -0,0 +1,130 @@
+"""
+outbox ของงานแจ้งเตือน: request แค่ INSERT แถว NotificationJob หนึ่งแถว (ใน transaction เดียวกับ
+การเปลี่ยนแปลงที่เป็นต้นเหตุ) แล้ว worker (python manage.py run_notification_worker) หยิบไปทำ
+fan-out และ push realtime ทีหลัง
+
+- idempotency: งานที่คีย์ซ้ำกับที่มีอยู่แล้วจะไม่ถูกเพิ่มอีก
+- retry: งานที่ error จะถูกเลื่อนไปทำใหม่แบบ exponential backoff จนครบ MAX_ATTEMPTS แล้วจึงเป็น FAILED
+- back-pressure: worker หยิบงานไม่เกินจำนวนที่ทำค้างอยู่ได้ งานที่เหลือรอในตารางอย่างปลอดภัย
+
+ปิดได้ด้วย settings.NOTIFICATION_OUTBOX_ENABLED = False (เช่นตอนพัฒนาที่ไม่ได้รัน worker)
+งานจะถูกทำทันทีใน request แบบเดิม
+"""
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import NotificationJob
+
+# ชื่องาน -> ฟังก์ชันที่รับ payload (ลงทะเบียนด้วย @task ใน notifications.signals)
+TASKS = {}
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30
+
+# งานที่อยู่ในสถานะ RUNNING นานเกินนี้ถือว่า worker ตายระหว่างทำ -> คืนกลับเป็น PENDING
+LOCK_TIMEOUT = timedelta(minutes=10)
+
+
+def task(name):
+    """ลงทะเบียนฟังก์ชันเป็นงานของ outbox ชื่อ `name`"""
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def outbox_enabled():
+    return getattr(settings, "NOTIFICATION_OUTBOX_ENABLED", True)
+
+
+def enqueue(name, payload, key=None):
+    """
+    เพิ่มงาน `name` พร้อม payload (ต้องแปลงเป็น JSON ได้)
+    `key` คือ idempotency key ของเหตุการณ์ — ไม่ระบุ = ถือว่าทุกครั้งเป็นงานใหม่
+    """
+    if name not in TASKS:
+        raise LookupError(f"ไม่รู้จักงานแจ้งเตือน {name!r}")
+    if not outbox_enabled():
+        TASKS[name](payload)
+        return
+    NotificationJob.objects.bulk_create(
+        [NotificationJob(task=name, payload=payload, idempotency_key=key or f"{name}:{uuid.uuid4().hex}")],
+        ignore_conflicts=True,
+    )
+
+
+def requeue_stale():
+    """คืนงานที่ค้าง RUNNING เกิน LOCK_TIMEOUT (worker ตาย) ให้กลับไปรอทำใหม่"""
+    return NotificationJob.objects.filter(
+        status=NotificationJob.Status.RUNNING,
+        locked_at__lt=timezone.now() - LOCK_TIMEOUT,
+    ).update(status=NotificationJob.Status.PENDING, locked_at=None)
+
+
+def claim(limit):
+    """
+    จองงานที่ถึงเวลาไม่เกิน `limit` งาน (เปลี่ยนเป็น RUNNING และนับ attempts)
+    ใช้ SELECT ... FOR UPDATE SKIP LOCKED เพื่อให้ worker หลายตัวไม่หยิบงานเดียวกัน
+    """
+    if limit <= 0:
+        return []
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            NotificationJob.objects.select_for_update(skip_locked=True)
+            .filter(status=NotificationJob.Status.PENDING, run_after__lte=now)
+            .order_by("run_after", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        NotificationJob.objects.filter(id__in=ids).update(
+            status=NotificationJob.Status.RUNNING,
+            locked_at=now,
+            attempts=F("attempts") + 1,
+        )
+    return list(NotificationJob.objects.filter(id__in=ids).order_by("run_after", "id"))
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+def run_job(job):
+    """ทำงานหนึ่งงานที่ claim มาแล้ว คืน True ถ้าสำเร็จ (ปลอดภัยที่จะเรียกจาก thread ของ worker)"""
+    close_old_connections()
+    try:
+        handler = TASKS.get(job.task)
+        try:
+            if handler is None:
+                raise LookupError(f"ไม่รู้จักงานแจ้งเตือน {job.task!r}")
+            # ทั้งงานอยู่ใน transaction เดียว: error กลางทาง -> ไม่มีแจ้งเตือนครึ่งๆ กลางๆ ก่อน retry
+            with transaction.atomic():
+                handler(job.payload)
+        except Exception:
+            now = timezone.now()
+            gave_up = job.attempts >= MAX_ATTEMPTS
+            NotificationJob.objects.filter(pk=job.pk).update(
+                status=NotificationJob.Status.FAILED if gave_up else NotificationJob.Status.PENDING,
+                run_after=now if gave_up else now + _retry_delay(job.attempts),
+                locked_at=None,
+                finished_at=now if gave_up else None,
+                last_error=traceback.format_exc()[-4000:],
+            )
+            return False
+
+        NotificationJob.objects.filter(pk=job.pk).update(
+            status=NotificationJob.Status.DONE,
+            locked_at=None,
+            finished_at=timezone.now(),
+            last_error="",
+        )
+        return True
+    finally:
+        close_old_connections()
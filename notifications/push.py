@@ -0,0 +1,159 @@
+"""
+ส่งแจ้งเตือน realtime ไปยัง websocket ของผู้ใช้ (NotificationsConsumer) แบบเป็นชุด
+
+- coalesce: แจ้งเตือนหลายรายการของผู้ใช้คนเดียวกันรวมเป็น frame เดียว ({count, items})
+- batch: ส่งทุก group ใน event loop เดียว (async_to_sync ครั้งเดียวต่อชุด) พร้อมกันไม่เกิน PUSH_CONCURRENCY
+  คำสั่งของ RedisChannelLayer จึงวิ่งต่อเนื่องบน connection pool เดียวกัน ไม่ต้องรอ round trip ทีละคน
+- ใน worker ของ outbox (run_notification_worker) dispatcher จะสะสมแจ้งเตือนไว้ PUSH_FLUSH_INTERVAL วินาที
+  แจ้งเตือนที่มาเป็นระลอก (เช่นแชทหลายข้อความติดกัน) ของคนเดียวกันจึงออกเป็น frame เดียว
+"""
+import asyncio
+import hashlib
+import threading
+from collections import defaultdict
+
+PUSH_CONCURRENCY = 50
+PUSH_FLUSH_INTERVAL = 0.25
+
+# จำนวนรายการสูงสุดที่แนบไปใน frame (count / chat_count ยังนับครบ)
+MAX_ITEMS_PER_FRAME = 20
+
+
+def group_name(user_pk):
+    """
+    ชื่อ group ของผู้ใช้ใน channel layer
+    pk ของผู้ใช้คืออีเมล ใช้ตรงๆ ไม่ได้ (ชื่อ group ได้เฉพาะ a-z A-Z 0-9 - _ . และยาวไม่เกิน 100)
+    """
+    return "notif_" + hashlib.sha1(str(user_pk).encode("utf-8")).hexdigest()
+
+
+def payload(notif):
+    return {
+        'id': notif.id,
+        'kind': notif.kind,
+        'title': notif.title,
+        'message': notif.message,
+        'link_url': notif.link_url,
+        'is_read': notif.is_read,
+    }
+
+
+def chat_payload(counter):
+    """payload ของตัวนับแชท (ChatUnread) — kind เดียวกับแจ้งเตือนแชทเดิม"""
+    return {
+        'id': None,
+        'kind': 'CHAT_MESSAGE',
+        'title': counter.title,
+        'message': counter.last_message,
+        'link_url': counter.link_url,
+        'is_read': False,
+        'room_id': counter.room_id,
+        'unread': counter.unread_count,
+    }
+
+
+def _frames(items):
+    """[(user_pk, payload), ...] -> [(group, message), ...] หนึ่ง message ต่อผู้ใช้"""
+    by_user = defaultdict(list)
+    for user_pk, data in items:
+        by_user[user_pk].append(data)
+    return [
+        (
+            group_name(user_pk),
+            {
+                "type": "notify",
+                "payload": payloads[-1],  # รายการล่าสุด (รูปแบบเดิม)
+                "items": payloads[-MAX_ITEMS_PER_FRAME:],
+                # นับครบทุกรายการแยกตามประเภท (items ถูกตัดเหลือ MAX_ITEMS_PER_FRAME)
+                "count": len(payloads),
+                "chat_count": sum(1 for data in payloads if data.get("kind") == "CHAT_MESSAGE"),
+            },
+        )
+        for user_pk, payloads in by_user.items()
+    ]
+
+
+async def _send_all(channel_layer, frames):
+    limit = asyncio.Semaphore(PUSH_CONCURRENCY)
+
+    async def send(group, message):
+        async with limit:
+            try:
+                await channel_layer.group_send(group, message)
+            except Exception:
+                pass
+
+    await asyncio.gather(*(send(group, message) for group, message in frames))
+
+
+def _send(items):
+    frames = _frames(items)
+    if not frames:
+        return
+    try:
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+
+        channel_layer = get_channel_layer()
+        if channel_layer is not None:
+            async_to_sync(_send_all)(channel_layer, frames)
+    except Exception:
+        pass
+
+
+class PushDispatcher:
+    """
+    ตัวรวม push: ถ้ายังไม่ได้ start() จะส่งทันที (เช่นใน request)
+    ถ้า start() แล้ว (worker) จะสะสมไว้แล้วส่งเป็นชุดทุก `interval` วินาทีจาก thread ของตัวเอง
+    """
+
+    def __init__(self, interval=PUSH_FLUSH_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending = []
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def submit(self, notifs):
+        self.submit_items([(notif.user_id, payload(notif)) for notif in notifs])
+
+    def submit_items(self, items):
+        """items: [(user_pk, payload), ...]"""
+        items = list(items)
+        if not items:
+            return
+        with self._lock:
+            if self._thread is not None:
+                self._pending.extend(items)
+                return
+        _send(items)
+
+    def flush(self):
+        with self._lock:
+            items, self._pending = self._pending, []
+        _send(items)
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            self.flush()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="notif-push", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """หยุด thread และส่งที่ค้างอยู่ให้หมด"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stopping.set()
+        thread.join()
+        self.flush()
+
+
+dispatcher = PushDispatcher()
@@ -0,0 +1,139 @@
+"""
+สร้างแจ้งเตือนก่อนวันกิจกรรมของผู้ใช้ทุกคนในรอบเดียว (รันวันละครั้ง: python manage.py materialize_reminders)
+แทนการสร้างแบบ lazy ทุกครั้งที่ผู้ใช้เปิดกระดิ่ง
+
+แต่ละวันมีการ query คงที่: โพสต์ที่จะเริ่มในอีก 3 / 1 วัน, ผู้สมัคร ACTIVE และผู้จัดเก็บของโพสต์เหล่านั้น
+แล้ว INSERT แบบ bulk — แถวที่มีอยู่แล้ว (เช่นจาก _schedule_reminders_for_post) ถูกข้ามด้วย
+uniq_user_kind_post_triggerdate เพราะ trigger_date เป็นวันที่เดียวกัน (วันกิจกรรม - จำนวนวัน)
+"""
+import datetime
+from collections import defaultdict
+
+from django.utils import timezone
+
+from activity_register.models import ActivityRegistration
+from post.models import Post
+from .fanout import FANOUT_BATCH_SIZE
+from .models import Notification
+from . import unread
+
+# เตือนล่วงหน้ากี่วัน
+DAYS_BEFORE = (3, 1)
+
+REMINDER_KINDS = (
+    Notification.Kind.OWNER_STATUS_REMINDER,
+    Notification.Kind.SAVED_REMINDER,
+    Notification.Kind.REGISTER_REMINDER,
+)
+
+POST_FIELDS = ("id", "title", "organizer", "event_date", "slots_available", "active_count")
+
+
+def _capacity_status_text(post):
+    cap = post.slots_available
+    if cap is None or cap <= 0:
+        return "กิจกรรมนี้ไม่จำกัดจำนวน"
+
+    reg_count = post.active_count
+    remaining = cap - reg_count
+    if remaining <= 0:
+        return f"ตอนนี้กิจกรรมเต็มแล้ว (สมัคร {reg_count}/{cap})"
+    return f"ตอนนี้สมัครแล้ว {reg_count}/{cap} เหลือ {remaining} ที่"
+
+
+def _posts_on(day):
+    # เทียบช่วงเวลาของวัน (ตาม TIME_ZONE) แทน __date เพื่อให้ใช้ index post_visible_date_idx ได้
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return list(
+        Post.objects.filter(
+            status=Post.Status.APPROVED,
+            is_hidden=False,
+            is_deleted=False,
+            event_date__gte=start,
+            event_date__lt=start + datetime.timedelta(days=1),
+        ).only(*POST_FIELDS)
+    )
+
+
+def _users_by_post(pairs):
+    out = defaultdict(set)
+    for post_id, user_id in pairs:
+        out[post_id].add(user_id)
+    return out
+
+
+def _reminder_rows(today, days_before):
+    posts = _posts_on(today + datetime.timedelta(days=days_before))
+    if not posts:
+        return []
+    post_ids = [p.pk for p in posts]
+
+    registered = _users_by_post(
+        ActivityRegistration.objects.filter(
+            post_id__in=post_ids,
+            user__isnull=False,
+            status=ActivityRegistration.Status.ACTIVE,
+        ).values_list("post_id", "user_id")
+    )
+    saved = _users_by_post(
+        Post.saves.through.objects.filter(post_id__in=post_ids).values_list("post_id", "user_id")
+    )
+
+    rows = []
+    for post in posts:
+        status_text = _capacity_status_text(post)
+
+        def row(user_id, kind, message):
+            return Notification(
+                user_id=user_id,
+                post=post,
+                kind=kind,
+                trigger_date=today,
+                title=post.title,
+                message=message,
+                link_url=f"/post/{post.id}/",
+            )
+
+        # (1) ผู้สร้างกิจกรรม: แนบสถานะผู้สมัคร/ความจุ
+        rows.append(row(
+            post.organizer_id,
+            Notification.Kind.OWNER_STATUS_REMINDER,
+            f"เตือนเจ้าของกิจกรรม: กิจกรรมของคุณจะเริ่มในอีก {days_before} วัน\n{status_text}",
+        ))
+
+        # (2) ผู้จัดเก็บที่ยังไม่ได้สมัคร — ข้ามถ้ากิจกรรมเต็มแล้ว (สมัครไม่ได้แล้ว)
+        if not post.is_full():
+            for user_id in saved[post.pk] - registered[post.pk]:
+                rows.append(row(
+                    user_id,
+                    Notification.Kind.SAVED_REMINDER,
+                    f"กิจกรรมที่คุณจัดเก็บจะเริ่มในอีก {days_before} วัน คุณยังสามารถสมัครได้\n{status_text}",
+                ))
+
+        # (3) ผู้สมัคร: 1 วันก่อน (แจ้งเสมอไม่ว่ากิจกรรมจะเต็มหรือไม่)
+        if days_before == 1:
+            for user_id in registered[post.pk]:
+                rows.append(row(
+                    user_id,
+                    Notification.Kind.REGISTER_REMINDER,
+                    f"กิจกรรมที่คุณสมัครจะเริ่มในอีก 1 วัน: {post.title}",
+                ))
+    return rows
+
+
+def materialize_reminders(today=None):
+    """
+    สร้างแจ้งเตือนล่วงหน้าทั้งหมดที่ถึงกำหนดในวัน `today` (ค่าเริ่มต้น = วันนี้)
+    เรียกซ้ำในวันเดียวกันได้ (แถวที่มีอยู่แล้วจะถูกข้าม) คืนจำนวนแถวที่สร้างใหม่
+    """
+    today = today or timezone.localdate()
+    due = Notification.objects.filter(trigger_date=today, kind__in=REMINDER_KINDS)
+    before = due.count()
+
+    rows = []
+    for days_before in DAYS_BEFORE:
+        rows.extend(_reminder_rows(today, days_before))
+    Notification.objects.bulk_create(rows, batch_size=FANOUT_BATCH_SIZE, ignore_conflicts=True)
+    unread.invalidate(row.user_id for row in rows)
+
+    return due.count() - before
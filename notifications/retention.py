@@ -0,0 +1,144 @@
+"""
+ดูแลขนาดตาราง Notification (รันเป็นระยะ: python manage.py prune_notifications)
+
+1) compact: แจ้งเตือนแชท (CHAT_MESSAGE) แบบเดิมถูกสร้างหนึ่งแถวต่อสมาชิกต่อข้อความ
+   -> ยุบเหลือแถวล่าสุดแถวเดียวต่อ (ผู้ใช้, ห้อง) โดยห้องระบุด้วย link_url
+   (ข้อความใหม่ใช้ตัวนับ ChatUnread แล้ว ขั้นนี้จึงเหลือไว้เก็บกวาดแถวเก่า)
+2) prune: ลบแจ้งเตือนที่อ่านแล้วและเก่ากว่า N วัน (เลือกเก็บลงไฟล์ archive ก่อนลบได้)
+   และงาน outbox ที่เสร็จแล้ว
+
+ทุกขั้นทำเป็นชุดละ batch_size แถว และพัก `pause` วินาทีระหว่างชุด เพื่อไม่ให้ล็อกตาราง/กินฐานข้อมูลนานๆ
+"""
+import gzip
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import Notification, NotificationJob
+from . import unread
+
+RETENTION_DAYS = 90
+BATCH_SIZE = 1000
+
+
+class Throttle:
+    """นับแถวที่แก้ไป แล้วพักทุกครั้งที่ครบ batch_size"""
+
+    def __init__(self, batch_size, pause):
+        self.batch_size = batch_size
+        self.pause = pause
+        self._since_pause = 0
+
+    def done(self, rows):
+        self._since_pause += rows
+        if self._since_pause >= self.batch_size:
+            self._since_pause = 0
+            if self.pause:
+                time.sleep(self.pause)
+
+
+def compact_chat_notifications(batch_size=BATCH_SIZE, pause=0.0):
+    """
+    ยุบแจ้งเตือนแชทให้เหลือแถวล่าสุดแถวเดียวต่อ (ผู้ใช้, ห้อง)
+    แถวที่เหลือยังไม่อ่านถ้ามีแถวใดในกลุ่มยังไม่อ่าน ข้อความบอกจำนวนข้อความที่ยังไม่อ่าน
+    คืนจำนวนแถวที่ลบ
+    """
+    groups = (
+        Notification.objects.filter(kind=Notification.Kind.CHAT_MESSAGE)
+        .order_by()
+        .values("user_id", "link_url")
+        .annotate(n=Count("id"), latest=Max("id"), unread=Count("id", filter=Q(is_read=False)))
+        .filter(n__gt=1)
+    )
+    throttle = Throttle(batch_size, pause)
+    touched = set()
+    removed = 0
+    for group in groups.iterator():
+        rows = Notification.objects.filter(
+            kind=Notification.Kind.CHAT_MESSAGE,
+            user_id=group["user_id"],
+            link_url=group["link_url"],
+        )
+        latest = rows.filter(pk=group["latest"]).only("message").first()
+        if latest is None:
+            continue
+        message = latest.message
+        if group["unread"] > 1:
+            message = f"{group['unread']} ข้อความใหม่ — ล่าสุด: {message}"
+        rows.filter(pk=latest.pk).update(is_read=group["unread"] == 0, message=message)
+
+        # ลบแถวเก่าของกลุ่มทีละชุด (id น้อยกว่าแถวล่าสุด)
+        while True:
+            ids = list(rows.filter(pk__lt=latest.pk).values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            removed += Notification.objects.filter(pk__in=ids).delete()[0]
+            throttle.done(len(ids))
+        touched.add(group["user_id"])
+        if len(touched) >= batch_size:
+            unread.invalidate(touched)
+            touched.clear()
+    unread.invalidate(touched)
+    return removed
+
+
+def _archive_path(archive_dir):
+    directory = Path(archive_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f"notifications-{timezone.now():%Y%m%d-%H%M%S}.jsonl.gz"
+
+
+def prune_read_notifications(days=RETENTION_DAYS, batch_size=BATCH_SIZE, pause=0.0, archive_dir=None):
+    """
+    ลบแจ้งเตือนที่อ่านแล้วและสร้างก่อน `days` วันที่แล้ว ทีละ batch_size แถว (ไล่ตาม id)
+    ถ้าระบุ archive_dir จะเขียนแถวที่ลบเป็น JSON lines (gzip) ลงไฟล์ใหม่ในโฟลเดอร์นั้นก่อนลบ
+    คืนจำนวนแถวที่ลบ
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    throttle = Throttle(batch_size, pause)
+    archive = gzip.open(_archive_path(archive_dir), "wt", encoding="utf-8") if archive_dir else None
+    removed = 0
+    last_id = 0
+    try:
+        while True:
+            batch = list(
+                Notification.objects.filter(id__gt=last_id, is_read=True, created_at__lt=cutoff)
+                .order_by("id")
+                .values()[:batch_size]
+            )
+            if not batch:
+                break
+            if archive is not None:
+                for row in batch:
+                    archive.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n")
+                archive.flush()
+            last_id = batch[-1]["id"]
+            removed += Notification.objects.filter(pk__in=[row["id"] for row in batch]).delete()[0]
+            throttle.done(len(batch))
+    finally:
+        if archive is not None:
+            archive.close()
+    return removed
+
+
+def prune_finished_jobs(days=RETENTION_DAYS, batch_size=BATCH_SIZE, pause=0.0):
+    """ลบงาน outbox ที่สำเร็จ/ล้มเหลวถาวรก่อน `days` วันที่แล้ว คืนจำนวนแถวที่ลบ"""
+    cutoff = timezone.now() - timedelta(days=days)
+    finished = NotificationJob.objects.filter(
+        status__in=(NotificationJob.Status.DONE, NotificationJob.Status.FAILED),
+        finished_at__lt=cutoff,
+    )
+    throttle = Throttle(batch_size, pause)
+    removed = 0
+    while True:
+        ids = list(finished.order_by("id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            break
+        removed += NotificationJob.objects.filter(pk__in=ids).delete()[0]
+        throttle.done(len(ids))
+    return removed
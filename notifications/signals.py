@@ -1,5 +1,5 @@
 from django.db.models.signals import post_save, pre_save
-from django.db import models
+from django.db import models, transaction
 from django.dispatch import receiver
 from django.utils import timezone
 from datetime import timedelta
@@ -7,6 +7,9 @@ from datetime import timedelta
 from post.models import Post
 from activity_register.models import ActivityRegistration
 from .models import Notification
+from .fanout import fan_out
+from . import chat_unread, outbox, push, unread
+from home import feed_cache
 
 
 def _capacity_status_text(post: Post, reg_count: int) -> str:
@@ -40,73 +43,66 @@ def _schedule_reminders_for_post(post: Post):
     today = timezone.localdate()
     event_date = post.event_date.date() if hasattr(post.event_date, 'date') else post.event_date
 
-    # helper to create message including status and current count/names
-    cap = getattr(post, 'slots_available', None)
-    active_count = ActivityRegistration.objects.filter(post=post, status=ActivityRegistration.Status.ACTIVE).count()
+    # helper to create message including status and current count
+    active_count = post.active_registrations_count()
     status_text = _capacity_status_text(post, active_count)
-    names = _registrant_names(post)
+    link_url = f"/post/{post.id}/"
 
-    # Organizer reminders (3d and 1d)
-    for days_before in (3, 1):
-        trigger = event_date - timedelta(days=days_before)
-        if trigger >= today:
-            Notification.objects.get_or_create(
-                user=post.organizer,
-                post=post,
-                kind=Notification.Kind.OWNER_STATUS_REMINDER,
-                trigger_date=trigger,
-                defaults={
-                    'title': post.title,
-                    'message': f"เตือนเจ้าของกิจกรรม {days_before} วันก่อนเริ่ม:\n{status_text}\n",
-                    'link_url': f"/post/{post.id}/",
-                },
-            )
-
-    # Savers (those who saved/bookmarked) — 3 days + 1 day before
-    # ข้ามผู้ที่สมัครแล้ว (ACTIVE) เพราะจะได้รับ REGISTER_REMINDER แทน
+    # ✅ คำนวณชุดผู้รับครั้งเดียว แล้วสร้างแจ้งเตือนแบบ bulk (ดู notifications.fanout)
     registered_user_ids = set(
-        ActivityRegistration.objects.filter(post=post, status=ActivityRegistration.Status.ACTIVE)
+        ActivityRegistration.objects.filter(post=post, user__isnull=False, status=ActivityRegistration.Status.ACTIVE)
         .values_list('user_id', flat=True)
     )
-    saved_user_ids = post.saves.values_list('pk', flat=True)
+    saved_user_ids = set(post.saves.values_list('pk', flat=True))
+
     for days_before in (3, 1):
-        trigger_saved = event_date - timedelta(days=days_before)
-        if trigger_saved >= today:
-            for uid in saved_user_ids:
-                if uid in registered_user_ids:
-                    continue
-                Notification.objects.get_or_create(
-                    user_id=uid,
-                    post=post,
-                    kind=Notification.Kind.SAVED_REMINDER,
-                    trigger_date=trigger_saved,
-                    defaults={
-                        'title': post.title,
-                        'message': f"กิจกรรมที่คุณจัดเก็บจะเริ่มในอีก {days_before} วัน คุณยังสามารถสมัครได้\n{_capacity_status_text(post, active_count)}",
-                        'link_url': f"/post/{post.id}/",
-                    },
-                )
+        trigger = event_date - timedelta(days=days_before)
+        if trigger < today:
+            continue
+
+        # Organizer reminders (3d and 1d)
+        fan_out(
+            [post.organizer_id],
+            Notification.Kind.OWNER_STATUS_REMINDER,
+            post=post,
+            trigger_date=trigger,
+            title=post.title,
+            message=f"เตือนเจ้าของกิจกรรม {days_before} วันก่อนเริ่ม:\n{status_text}\n",
+            link_url=link_url,
+        )
+
+        # Savers (those who saved/bookmarked) — 3 days + 1 day before
+        # ข้ามผู้ที่สมัครแล้ว (ACTIVE) เพราะจะได้รับ REGISTER_REMINDER แทน
+        fan_out(
+            saved_user_ids,
+            Notification.Kind.SAVED_REMINDER,
+            post=post,
+            trigger_date=trigger,
+            title=post.title,
+            message=f"กิจกรรมที่คุณจัดเก็บจะเริ่มในอีก {days_before} วัน คุณยังสามารถสมัครได้\n{status_text}",
+            link_url=link_url,
+            exclude=registered_user_ids,
+        )
 
     # Registrants — 1 day before (แจ้งเสมอไม่ว่ากิจกรรมจะเต็มหรือไม่ เพราะเขาสมัครแล้ว)
     trigger_reg = event_date - timedelta(days=1)
     if trigger_reg >= today:
-        reg_user_ids = (
-            ActivityRegistration.objects.filter(post=post, user__isnull=False, status=ActivityRegistration.Status.ACTIVE)
-            .values_list('user_id', flat=True)
-            .distinct()
+        fan_out(
+            registered_user_ids,
+            Notification.Kind.REGISTER_REMINDER,
+            post=post,
+            trigger_date=trigger_reg,
+            title=post.title,
+            message=f"กิจกรรมที่คุณสมัครจะเริ่มในอีก 1 วัน: {post.title}",
+            link_url=link_url,
         )
-        for uid in reg_user_ids:
-            Notification.objects.get_or_create(
-                user_id=uid,
-                post=post,
-                kind=Notification.Kind.REGISTER_REMINDER,
-                trigger_date=trigger_reg,
-                defaults={
-                    'title': post.title,
-                    'message': f"กิจกรรมที่คุณสมัครจะเริ่มในอีก 1 วัน: {post.title}",
-                    'link_url': f"/post/{post.id}/",
-                },
-            )
+
+
+@receiver(post_save, sender=Notification)
+def refresh_unread_count(sender, instance: Notification, created, **kwargs):
+    # ✅ แจ้งเตือนใหม่ที่สร้างทีละแถว (get_or_create/create) -> ให้ badge ของผู้รับนับใหม่
+    if created:
+        unread.invalidate([instance.user_id])
 
 
 def _schedule_reminder_for_registration(reg: ActivityRegistration):
@@ -176,7 +172,7 @@ def notify_owner_when_full_or_cancel(sender, instance: ActivityRegistration, cre
     if cap is None or cap <= 0:
         return
     # นับเฉพาะ ACTIVE registrations เท่านั้น
-    active_count = ActivityRegistration.objects.filter(post=post, status=ActivityRegistration.Status.ACTIVE).count()
+    active_count = post.active_registrations_count()
     if active_count < cap:
         return
     status_text = _capacity_status_text(post, active_count)
@@ -194,192 +190,216 @@ def notify_owner_when_full_or_cancel(sender, instance: ActivityRegistration, cre
     # notify savers/bookmarkers immediately that the activity is full
     saved_user_ids = post.saves.values_list('pk', flat=True)
     names = _registrant_names(post)
-    for uid in saved_user_ids:
-        if uid == getattr(post.organizer, 'pk', None):
-            continue
-        Notification.objects.get_or_create(
-            user_id=uid,
-            post=post,
-            kind=Notification.Kind.SAVED_REMINDER,
-            trigger_date=today,
-            defaults={
-                'title': post.title,
-                'message': f"กิจกรรมเต็มแล้ว\n{status_text}\nผู้สมัคร: {names}",
-                'link_url': f"/post/{post.id}/",
-            },
-        )
+    fan_out(
+        saved_user_ids,
+        Notification.Kind.SAVED_REMINDER,
+        post=post,
+        trigger_date=today,
+        title=post.title,
+        message=f"กิจกรรมเต็มแล้ว\n{status_text}\nผู้สมัคร: {names}",
+        link_url=f"/post/{post.id}/",
+        exclude={post.organizer_id},
+    )
 
 
 # -------------------------
 # (4) แจ้งผู้สมัคร + ผู้จัดเก็บ เมื่อเจ้าของแก้โพสต์/เปลี่ยนวันที่
 # -------------------------
+
+# ฟิลด์ที่ใช้ตัดสินว่าโพสต์ถูกแก้ไข/ซ่อน/ลบ/อนุมัติ
+TRACKED_POST_FIELDS = (
+    "title", "location", "description", "category", "slots_available", "fee",
+    "allow_register", "event_date", "status", "is_hidden", "is_deleted",
+)
+
+
 @receiver(pre_save, sender=Post)
 def snapshot_old_post(sender, instance: Post, **kwargs):
     if not instance.pk:
         instance._old = None
         return
-    try:
-        instance._old = Post.objects.get(pk=instance.pk)
-    except Post.DoesNotExist:
-        instance._old = None
+    # ✅ ใช้ค่าที่โหลดมาพร้อม instance (Post.from_db) — SELECT ซ้ำเฉพาะเมื่อค่าไม่ครบ (เช่นโหลดด้วย .only())
+    loaded = instance._loaded_values or {}
+    if all(name in loaded for name in TRACKED_POST_FIELDS):
+        instance._old = {name: loaded[name] for name in TRACKED_POST_FIELDS}
+    else:
+        instance._old = Post.objects.filter(pk=instance.pk).values(*TRACKED_POST_FIELDS).first()
+
+
+def _remember_saved_values(instance: Post, update_fields):
+    # save ครั้งถัดไปของ instance เดิมจะเทียบกับค่าที่เพิ่งบันทึก
+    saved = update_fields or TRACKED_POST_FIELDS
+    deferred = instance.get_deferred_fields()
+    instance._loaded_values = {
+        **(instance._loaded_values or {}),
+        **{name: getattr(instance, name) for name in TRACKED_POST_FIELDS if name in saved and name not in deferred},
+    }
+
+
+def _post_change(old, instance: Post):
+    """เทียบค่าก่อน/หลัง save คืน payload ของงาน post_changed ({} = ไม่ต้องแจ้งใคร)"""
+    # ✅ ตรวจสอบว่าถูกลบ/ซ่อนหรือไม่ (admin action)
+    was_deleted = not old["is_deleted"] and instance.is_deleted
+    was_hidden = not old["is_hidden"] and instance.is_hidden
+    if was_deleted or was_hidden:
+        return {"removed": "deleted" if was_deleted else "hidden"}
+
+    change = {}
+    # หากสถานะถูกเปลี่ยนเป็น APPROVED (เช่น แอดมินอนุมัติโพสต์) -> แจ้งเจ้าของและผู้ติดตาม
+    if old["status"] != instance.status and instance.status == "APPROVED":
+        if not (instance.is_deleted or instance.is_hidden):
+            change["published"] = True
+
+    # ✅ ตรวจสอบการแก้ไขฟิลด์
+    changed = []
+    if old["title"] != instance.title:
+        changed.append("ชื่อกิจกรรม")
+    if old["location"] != instance.location:
+        changed.append("สถานที่")
+    if old["description"] != instance.description:
+        changed.append("รายละเอียด")
+    if old["category"] != instance.category:
+        changed.append("ประเภทกิจกรรม")
+    if old["slots_available"] != instance.slots_available:
+        changed.append("จำนวนที่รับสมัคร")
+    if old["fee"] != instance.fee:
+        changed.append("ค่าใช้จ่าย")
+    if old["allow_register"] != instance.allow_register:
+        changed.append("สถานะการเปิดรับสมัคร")
+    if old["event_date"] != instance.event_date:
+        old_dt = old["event_date"].strftime("%d/%m/%Y %H:%M") if old["event_date"] else "-"
+        new_dt = instance.event_date.strftime("%d/%m/%Y %H:%M") if instance.event_date else "-"
+        changed.append(f"วันเวลา (เดิม {old_dt} → ใหม่ {new_dt})")
+        change["date_changed"] = True
+
+    if changed:
+        change["changed"] = changed
+    return change
 
 
 @receiver(post_save, sender=Post)
-def notify_users_when_post_updated(sender, instance: Post, created, **kwargs):
+def notify_users_when_post_updated(sender, instance: Post, created, update_fields=None, **kwargs):
     """
     แจ้งเตือนเมื่อโพสต์มีการเปลี่ยนแปลง:
     - แก้ไข → แจ้งผู้สมัคร + ผู้จัดเก็บ
     - ซ่อน/ลบ (โดยแอดมิน) → แจ้งผู้สมัคร + เจ้าของโพสต์ด้วย
+
+    ใน request แค่เทียบค่าแล้วเพิ่มงาน post_changed เข้า outbox — fan-out ทำใน worker
     """
+    # ✅ โพสต์เปลี่ยน (รวมถึงอนุมัติ/ซ่อน/ลบจากหน้า approver) -> ล้างการ์ดและรายการหน้า feed ที่ cache ไว้
+    feed_cache.invalidate_post(instance.pk)
+
+    old = getattr(instance, "_old", None)
+    _remember_saved_values(instance, update_fields)
+
     if created:
         # หากโพสต์ยังไม่ถูกอนุมัติ/ถูกซ่อน/ถูกลบ -> ไม่ส่งการแจ้งเตือน
         if instance.is_deleted or instance.is_hidden or instance.status != "APPROVED":
             return
+        change = {"published": True}
+    else:
+        if old is None:
+            return
+        change = _post_change(old, instance)
+        if not change:
+            return
 
-        today = timezone.localdate()
-
-        # แจ้งเจ้าของว่าโพสต์ของเขาได้รับการอนุมัติและเผยแพร่แล้ว
-        Notification.objects.get_or_create(
-            user=instance.organizer,
-            post=instance,
-            kind=Notification.Kind.OWNER_POSTED,
-            trigger_date=today,
-            defaults={
-                "title": instance.title,
-                "message": f"โพสต์กิจกรรมของคุณได้รับการอนุมัติและเผยแพร่แล้ว: \"{instance.title}\"",
-                "link_url": f"/post/{instance.id}/",
-            },
-        )
+    change["post_id"] = instance.pk
+    # หนึ่ง save = หนึ่งงาน (updated_at เปลี่ยนทุกครั้งที่ save)
+    outbox.enqueue("post_changed", change, key=f"post_changed:{instance.pk}:{instance.updated_at.isoformat()}")
 
-        # แจ้งผู้ติดตาม (followers) ว่ามีกิจกรรมใหม่
-        _notify_followers_new_post(instance)
-        # schedule reminders for organizer/savers/registrants
-        _schedule_reminders_for_post(instance)
-        return
 
-    old = getattr(instance, "_old", None)
-    if old is None:
+@outbox.task("post_changed")
+def run_post_changed(payload):
+    post = Post.objects.select_related("organizer").filter(pk=payload["post_id"]).first()
+    if post is None:
         return
 
     today = timezone.localdate()
+    link_url = f"/post/{post.id}/"
 
-    # ✅ ตรวจสอบว่าถูกลบ/ซ่อนหรือไม่ (admin action)
-    was_deleted = not old.is_deleted and instance.is_deleted
-    was_hidden = not old.is_hidden and instance.is_hidden
-
-    if was_deleted or was_hidden:
-        action_text = "ถูกลบ" if was_deleted else "ถูกซ่อน"
-        kind = Notification.Kind.POST_DELETED if was_deleted else Notification.Kind.POST_HIDDEN
+    removed = payload.get("removed")
+    if removed:
+        action_text = "ถูกลบ" if removed == "deleted" else "ถูกซ่อน"
+        kind = Notification.Kind.POST_DELETED if removed == "deleted" else Notification.Kind.POST_HIDDEN
 
         # แจ้งผู้สมัคร
         reg_user_ids = (
-            ActivityRegistration.objects.filter(post=instance, user__isnull=False)
+            ActivityRegistration.objects.filter(post=post, user__isnull=False)
             .values_list("user_id", flat=True)
             .distinct()
         )
         # แจ้งเจ้าของโพสต์ด้วย (กรณีแอดมินลบ)
         target_ids = set(reg_user_ids)
-        if instance.organizer_id:
-            target_ids.add(instance.organizer_id)
-
-        for uid in target_ids:
-            Notification.objects.get_or_create(
-                user_id=uid,
-                post=instance,
-                kind=kind,
-                trigger_date=today,
-                defaults={
-                    "title": instance.title,
-                    "message": f"กิจกรรม \"{instance.title}\" {action_text}โดยผู้ดูแลระบบ",
-                    "link_url": f"/post/{instance.id}/",
-                },
-            )
-        return
+        target_ids.add(post.organizer_id)
 
-    # หากสถานะถูกเปลี่ยนเป็น APPROVED (เช่น แอดมินอนุมัติโพสต์) -> แจ้งเจ้าของและผู้ติดตาม
-    if old.status != instance.status and instance.status == "APPROVED":
-        if instance.is_deleted or instance.is_hidden:
-            pass
-        else:
-            today = timezone.localdate()
-            Notification.objects.get_or_create(
-                user=instance.organizer,
-                post=instance,
-                kind=Notification.Kind.OWNER_POSTED,
-                trigger_date=today,
-                defaults={
-                    "title": instance.title,
-                    "message": f"โพสต์กิจกรรมของคุณได้รับการอนุมัติและเผยแพร่แล้ว: \"{instance.title}\"",
-                    "link_url": f"/post/{instance.id}/",
-                },
-            )
-            _notify_followers_new_post(instance)
-            _schedule_reminders_for_post(instance)
-
-    # ✅ ตรวจสอบการแก้ไขฟิลด์
-    changed = []
+        fan_out(
+            target_ids,
+            kind,
+            post=post,
+            trigger_date=today,
+            title=post.title,
+            message=f"กิจกรรม \"{post.title}\" {action_text}โดยผู้ดูแลระบบ",
+            link_url=link_url,
+        )
+        return
 
-    if old.title != instance.title:
-        changed.append("ชื่อกิจกรรม")
-    if old.location != instance.location:
-        changed.append("สถานที่")
-    if old.description != instance.description:
-        changed.append("รายละเอียด")
-    if old.category != instance.category:
-        changed.append("ประเภทกิจกรรม")
-    if old.slots_available != instance.slots_available:
-        changed.append("จำนวนที่รับสมัคร")
-    if old.fee != instance.fee:
-        changed.append("ค่าใช้จ่าย")
-    if old.allow_register != instance.allow_register:
-        changed.append("สถานะการเปิดรับสมัคร")
-    if old.event_date != instance.event_date:
-        old_dt = old.event_date.strftime("%d/%m/%Y %H:%M") if old.event_date else "-"
-        new_dt = instance.event_date.strftime("%d/%m/%Y %H:%M") if instance.event_date else "-"
-        changed.append(f"วันเวลา (เดิม {old_dt} → ใหม่ {new_dt})")
+    # โพสต์อาจถูกซ่อน/ลบไปแล้วระหว่างรอคิว -> ไม่ประกาศการเผยแพร่
+    if payload.get("published") and not (post.is_deleted or post.is_hidden) and post.status == "APPROVED":
+        # แจ้งเจ้าของว่าโพสต์ของเขาได้รับการอนุมัติและเผยแพร่แล้ว
+        Notification.objects.get_or_create(
+            user=post.organizer,
+            post=post,
+            kind=Notification.Kind.OWNER_POSTED,
+            trigger_date=today,
+            defaults={
+                "title": post.title,
+                "message": f"โพสต์กิจกรรมของคุณได้รับการอนุมัติและเผยแพร่แล้ว: \"{post.title}\"",
+                "link_url": link_url,
+            },
+        )
+        # แจ้งผู้ติดตาม (followers) ว่ามีกิจกรรมใหม่
+        _notify_followers_new_post(post)
+        # schedule reminders for organizer/savers/registrants
+        _schedule_reminders_for_post(post)
 
+    if payload.get("date_changed"):
         # reschedule reminders for this post when event date changed
         Notification.objects.filter(
-            post=instance,
+            post=post,
             kind__in=(
                 Notification.Kind.REGISTER_REMINDER,
                 Notification.Kind.SAVED_REMINDER,
                 Notification.Kind.OWNER_STATUS_REMINDER,
             ),
         ).delete()
-        _schedule_reminders_for_post(instance)
+        _schedule_reminders_for_post(post)
 
-    if not changed:
+    if not payload.get("changed"):
         return
 
-    change_text = ", ".join(changed)
+    change_text = ", ".join(payload["changed"])
 
     # ผู้สมัคร
     reg_user_ids = (
-        ActivityRegistration.objects.filter(post=instance, user__isnull=False)
+        ActivityRegistration.objects.filter(post=post, user__isnull=False)
         .values_list("user_id", flat=True)
         .distinct()
     )
 
     # ผู้จัดเก็บ (M2M)
-    saved_user_ids = instance.saves.values_list("pk", flat=True)
-
-    target_ids = set(reg_user_ids) | set(saved_user_ids)
-    if instance.organizer_id in target_ids:
-        target_ids.remove(instance.organizer_id)
+    saved_user_ids = post.saves.values_list("pk", flat=True)
 
-    for uid in target_ids:
-        Notification.objects.get_or_create(
-            user_id=uid,
-            post=instance,
-            kind=Notification.Kind.POST_UPDATED,
-            trigger_date=today,
-            defaults={
-                "title": instance.title,
-                "message": f"เจ้าของกิจกรรมได้แก้ไขโพสต์: {change_text}\n",
-                "link_url": f"/post/{instance.id}/",
-            },
-        )
+    fan_out(
+        set(reg_user_ids) | set(saved_user_ids),
+        Notification.Kind.POST_UPDATED,
+        post=post,
+        trigger_date=today,
+        title=post.title,
+        message=f"เจ้าของกิจกรรมได้แก้ไขโพสต์: {change_text}\n",
+        link_url=link_url,
+        exclude={post.organizer_id},
+    )
 
 
 # -------------------------
@@ -388,25 +408,19 @@ def notify_users_when_post_updated(sender, instance: Post, created, **kwargs):
 def _notify_followers_new_post(post: Post):
     """เมื่อผู้ใช้สร้างโพสต์ใหม่ แจ้งเตือนผู้ที่ติดตามอยู่"""
     try:
-        from users.models import Profile
-        organizer_profile = Profile.objects.get(user=post.organizer)
-        # followers ของ organizer คือ Profile ที่อยู่ใน followers M2M
-        follower_profiles = organizer_profile.followers.all()
-
-        today = timezone.localdate()
-
-        for fp in follower_profiles:
-            Notification.objects.get_or_create(
-                user=fp.user,
-                post=post,
-                kind=Notification.Kind.FOLLOWER_NEW_POST,
-                trigger_date=today,
-                defaults={
-                    "title": post.title,
-                    "message": f"{post.organizer.get_full_name() or post.organizer.email} ได้โพสต์กิจกรรมใหม่: \"{post.title}\"",
-                    "link_url": f"/post/{post.id}/",
-                },
-            )
+        from users.follow_graph import follower_ids
+        # followers ของ organizer (user pk) จากกราฟการติดตาม
+        follower_user_ids = follower_ids(post.organizer_id)
+
+        fan_out(
+            follower_user_ids,
+            Notification.Kind.FOLLOWER_NEW_POST,
+            post=post,
+            trigger_date=timezone.localdate(),
+            title=post.title,
+            message=f"{post.organizer.get_full_name() or post.organizer.email} ได้โพสต์กิจกรรมใหม่: \"{post.title}\"",
+            link_url=f"/post/{post.id}/",
+        )
     except Exception:
         pass
 
@@ -414,28 +428,6 @@ def _notify_followers_new_post(post: Post):
 # -------------------------
 # (6) แจ้งเตือนแอดมิน/approver เมื่อมีโพสต์ใหม่รออนุมัติ หรือมีรายงานใหม่
 # -------------------------
-def _push_realtime(user, notif):
-    """ส่ง push ผ่าน channel layer ทันที"""
-    try:
-        from asgiref.sync import async_to_sync
-        from channels.layers import get_channel_layer
-
-        channel_layer = get_channel_layer()
-        payload = {
-            'id': notif.id,
-            'kind': notif.kind,
-            'title': notif.title,
-            'message': notif.message,
-            'link_url': notif.link_url,
-            'is_read': notif.is_read,
-        }
-        async_to_sync(channel_layer.group_send)(
-            f"notif_{user.id}", {"type": "notify", "payload": payload}
-        )
-    except Exception:
-        pass
-
-
 def _get_admin_approver_users():
     """คืนรายชื่อผู้ใช้ที่มี role ADMIN/APPROVER หรือ is_superuser"""
     from users.models import User
@@ -447,26 +439,43 @@ def _get_admin_approver_users():
     )
 
 
+def _push_after_commit(notifs):
+    # push หลัง commit เท่านั้น (งานใน worker อาจ rollback แล้ว retry) — รวมเป็นชุดด้วย notifications.push
+    notifs = list(notifs)
+    transaction.on_commit(lambda: push.dispatcher.submit(notifs))
+
+
 def notify_admins_new_post(post):
-    """แจ้งเตือนแอดมิน/approver ว่ามีโพสต์ใหม่รออนุมัติ"""
-    admins = _get_admin_approver_users()
+    """แจ้งเตือนแอดมิน/approver ว่ามีโพสต์ใหม่รออนุมัติ (fan-out ทำใน worker ของ outbox)"""
     organizer_name = post.organizer.get_full_name() or post.organizer.email
+    outbox.enqueue(
+        "admin_new_post",
+        {
+            "post_id": post.pk,
+            "message": f"{organizer_name} ส่งคำขอโพสต์กิจกรรม \"{post.title}\" รออนุมัติ",
+        },
+        key=f"admin_new_post:{post.pk}",
+    )
 
-    for admin_user in admins:
-        notif = Notification.objects.create(
-            user=admin_user,
-            post=post,
-            kind=Notification.Kind.ADMIN_NEW_POST,
-            title="มีกิจกรรมใหม่รออนุมัติ",
-            message=f"{organizer_name} ส่งคำขอโพสต์กิจกรรม \"{post.title}\" รออนุมัติ",
-            link_url="/approver/?main=approval",
-        )
-        _push_realtime(admin_user, notif)
+
+@outbox.task("admin_new_post")
+def run_admin_new_post(payload):
+    post = Post.objects.filter(pk=payload["post_id"]).first()
+    if post is None:
+        return
+    notifs = fan_out(
+        _get_admin_approver_users().values_list("pk", flat=True),
+        Notification.Kind.ADMIN_NEW_POST,
+        post=post,
+        title="มีกิจกรรมใหม่รออนุมัติ",
+        message=payload["message"],
+        link_url="/approver/?main=approval",
+    )
+    _push_after_commit(notifs)
 
 
 def notify_admins_new_report(report_type, reporter, target_name, detail=""):
-    """แจ้งเตือนแอดมิน/approver ว่ามีรายงานใหม่"""
-    admins = _get_admin_approver_users()
+    """แจ้งเตือนแอดมิน/approver ว่ามีรายงานใหม่ (fan-out ทำใน worker ของ outbox)"""
     reporter_name = reporter.get_full_name() or reporter.email
 
     if report_type == "post":
@@ -479,52 +488,54 @@ def notify_admins_new_report(report_type, reporter, target_name, detail=""):
     if detail:
         message += f" — เหตุผล: {detail[:80]}"
 
-    for admin_user in admins:
-        notif = Notification.objects.create(
-            user=admin_user,
-            kind=Notification.Kind.ADMIN_NEW_REPORT,
-            title=title,
-            message=message,
-            link_url="/approver/?main=manage&sub=reports",
-        )
-        _push_realtime(admin_user, notif)
+    outbox.enqueue("admin_new_report", {"title": title, "message": message})
+
+
+@outbox.task("admin_new_report")
+def run_admin_new_report(payload):
+    notifs = fan_out(
+        _get_admin_approver_users().values_list("pk", flat=True),
+        Notification.Kind.ADMIN_NEW_REPORT,
+        title=payload["title"],
+        message=payload["message"],
+        link_url="/approver/?main=manage&sub=reports",
+    )
+    _push_after_commit(notifs)
 
 
 # -------------------------
 # (7) แจ้งเตือนข้อความแชทใหม่
 # -------------------------
 def notify_chat_message(sender_user, room, message_preview=""):
-    """เรียกใช้จาก chat consumer/view เมื่อมีข้อความใหม่"""
+    """เรียกใช้จาก chat consumer/view เมื่อมีข้อความใหม่ (เพิ่มตัวนับ + push ทำใน worker ของ outbox)"""
+    outbox.enqueue(
+        "chat_message",
+        {
+            "room_id": room.pk,
+            "sender_id": sender_user.pk,
+            "title": f"ข้อความใหม่จาก {sender_user.get_full_name() or sender_user.email}",
+            "message": message_preview[:100] if message_preview else "ส่งข้อความมาหาคุณ",
+            "link_url": f"/chat/dm/{sender_user.email}/" if room.room_type == "DM" else f"/chat/activity/{room.post_id}/" if room.post_id else "/chat/inbox/",
+        },
+    )
+
+
+@outbox.task("chat_message")
+def run_chat_message(payload):
     from chat.models import ChatMembership
-    today = timezone.localdate()
 
-    members = ChatMembership.objects.filter(room=room).exclude(user=sender_user)
-    room_name = room.name or "ห้องแชท"
-
-    for m in members:
-        # ไม่ใช้ get_or_create กับ trigger_date เพื่อให้แจ้งทุกครั้ง
-        notif = Notification.objects.create(
-            user=m.user,
-            kind=Notification.Kind.CHAT_MESSAGE,
-            title=f"ข้อความใหม่จาก {sender_user.get_full_name() or sender_user.email}",
-            message=message_preview[:100] if message_preview else "ส่งข้อความมาหาคุณ",
-            link_url=f"/chat/dm/{sender_user.email}/" if room.room_type == "DM" else f"/chat/activity/{room.post_id}/" if room.post_id else "/chat/inbox/",
-        )
+    member_ids = ChatMembership.objects.filter(room_id=payload["room_id"]).values_list("user_id", flat=True)
+
+    # ✅ ตัวนับต่อ (ผู้ใช้, ห้อง) แทน Notification หนึ่งแถวต่อข้อความ (ดู notifications.chat_unread)
+    counters = chat_unread.bump(
+        payload["room_id"],
+        member_ids,
+        payload["sender_id"],
+        title=payload["title"],
+        message=payload["message"],
+        link_url=payload["link_url"],
+    )
 
-        # ส่ง push ทันทีผ่าน channel layer ไปยังกลุ่มผู้ใช้ (notif_<user_id>)
-        try:
-            from asgiref.sync import async_to_sync
-            from channels.layers import get_channel_layer
-
-            channel_layer = get_channel_layer()
-            payload = {
-                'id': notif.id,
-                'kind': notif.kind,
-                'title': notif.title,
-                'message': notif.message,
-                'link_url': notif.link_url,
-                'is_read': notif.is_read,
-            }
-            async_to_sync(channel_layer.group_send)(f"notif_{m.user.id}", {"type": "notify", "payload": payload})
-        except Exception:
-            pass
+    # ส่ง push ผ่าน channel layer ไปยังกลุ่มของผู้รับแต่ละคน (push.group_name) หลัง commit
+    items = [(counter.user_id, push.chat_payload(counter)) for counter in counters]
+    transaction.on_commit(lambda: push.dispatcher.submit_items(items))
@@ -1,3 +1,100 @@
+import json
+import re
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+
+from .models import ChatUnread, Notification
+from . import unread
+
+PLAN_VENDORS = ("mysql", "sqlite")
+
+
+def _mysql_tables(node):
+    # แผนแบบ JSON ของ MySQL ซ้อน table ไว้ใต้ query_block / ordering_operation / nested_loop
+    if isinstance(node, dict):
+        if "table_name" in node:
+            yield node
+        for value in node.values():
+            yield from _mysql_tables(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _mysql_tables(value)
+
+
+def indexes_used(qs, model=Notification):
+    """
+    ชื่อ index ที่แผนการ query (EXPLAIN) ใช้อ่านตารางของ model — set ว่าง = อ่านทั้งตาราง
+    (None ถ้าไม่รองรับการอ่านแผนของฐานข้อมูลนี้ — ดู PLAN_VENDORS)
+    ทดสอบบนฐานข้อมูลที่สร้างจาก migration จริง ชื่อ index จึงต้องตรงกับใน migration
+    """
+    table = model._meta.db_table
+    if connection.vendor == "mysql":
+        plan = json.loads(qs.explain(format="json"))
+        return {t["key"] for t in _mysql_tables(plan) if t["table_name"] == table and t.get("key")}
+    if connection.vendor == "sqlite":
+        return {
+            _sqlite_index_name(model, m.group(1))
+            for line in qs.explain().splitlines()
+            if re.search(rf"\b{table}\b", line)
+            for m in [re.search(r"USING (?:COVERING )?INDEX (\w+)", line)]
+            if m
+        }
+    return None
+
+
+def _sqlite_index_name(model, name):
+    # UniqueConstraint ที่มากับ CreateModel ถูกสร้างใน CREATE TABLE -> SQLite ตั้งชื่อเป็น sqlite_autoindex_*
+    # แปลงกลับเป็นชื่อ constraint ของ model ที่มีคอลัมน์ชุดเดียวกัน
+    if not name.startswith("sqlite_autoindex_"):
+        return name
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA index_info({connection.ops.quote_name(name)})")
+        columns = [row[2] for row in sorted(cursor.fetchall())]
+    for constraint in model._meta.constraints:
+        fields = getattr(constraint, "fields", ())
+        if [model._meta.get_field(f).column for f in fields] == columns:
+            return constraint.name
+    return name
+
+
+@skipUnless(connection.vendor in PLAN_VENDORS, "EXPLAIN parsing รองรับเฉพาะ MySQL / SQLite")
+class NotificationIndexTests(TestCase):
+    """เส้นทาง query ที่ถูกเรียกบ่อยของกล่องแจ้งเตือนต้องใช้ index (ไม่อ่านทั้งตาราง)"""
+
+    user_id = "someone@example.com"
+
+    def setUp(self):
+        self.today = timezone.localdate()
+
+    def test_inbox_list_uses_user_created_index(self):
+        # api_list_notifications
+        qs = (
+            Notification.objects.filter(user_id=self.user_id)
+            .filter(unread.visible_q(self.today))
+            .order_by("-created_at")[:30]
+        )
+        self.assertIn("notif_user_created_idx", indexes_used(qs))
+
+    def test_unread_counts_use_unread_index(self):
+        # unread.counts_for (COUNT ไม่มี ORDER BY)
+        qs = Notification.objects.filter(
+            unread.visible_q(self.today), user_id=self.user_id, is_read=False
+        ).order_by()
+        self.assertIn("notif_user_unread_idx", indexes_used(qs))
+
+    def test_chat_mark_room_read_uses_user_room_index(self):
+        # chat_unread.mark_room_read (แถวเดียวต่อผู้ใช้+ห้อง)
+        qs = ChatUnread.objects.filter(user_id=self.user_id, room_id=1, unread_count__gt=0).order_by()
+        self.assertIn("uniq_chat_unread_user_room", indexes_used(qs, ChatUnread))
 
-# Create your tests here.
+    def test_chat_unread_sum_uses_user_leading_index(self):
+        # unread.counts_for: SUM(unread_count) ต่อผู้ใช้ — index ใดก็ได้ที่ขึ้นต้นด้วย user_id
+        # (uniq_chat_unread_user_room หรือ index ของ FK user แล้วแต่ planner)
+        qs = ChatUnread.objects.filter(user_id=self.user_id).order_by()
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, ChatUnread._meta.db_table)
+        leading = {name for name, c in constraints.items() if c["index"] and c["columns"][:1] == ["user_id"]}
+        self.assertTrue(indexes_used(qs, ChatUnread) & leading, qs.query)
@@ -0,0 +1,68 @@
+"""
+ตัวนับแจ้งเตือนที่ยังไม่อ่านต่อผู้ใช้ (badge กระดิ่ง + badge แชท) เก็บใน cache
+
+- อ่าน: cache hit = ไม่มี query / miss = COUNT แจ้งเตือน + SUM ตัวนับแชท (ChatUnread) อย่างละหนึ่ง query
+- สร้างแจ้งเตือน/ข้อความแชทใหม่: ลบค่าของผู้รับ (invalidate) — bulk insert แบบ ignore_conflicts ไม่รู้ว่าเพิ่มกี่แถว
+- อ่านแล้ว: ลดค่าลงหนึ่ง (decr) ไม่ต้องนับใหม่
+
+นับเฉพาะแจ้งเตือนที่ถึง trigger_date แล้ว (ตรงกับที่ api_list_notifications แสดง)
+คีย์มีวันที่อยู่ด้วย วันใหม่จึงนับใหม่เองเมื่อแจ้งเตือนล่วงหน้าถึงกำหนด
+ค่าที่คลาดเคลื่อนจากการลบแถวตรงๆ หายไปเองภายใน UNREAD_CACHE_TIMEOUT
+"""
+from django.core.cache import cache
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .models import ChatUnread, Notification
+
+UNREAD_CACHE_TIMEOUT = 60 * 5
+
+
+def _keys(user_id, day):
+    return f"notif:unread:{day.isoformat()}:{user_id}", f"notif:unread-chat:{day.isoformat()}:{user_id}"
+
+
+def visible_q(today):
+    """แจ้งเตือนที่ถึง trigger_date แล้ว หรือไม่มี trigger_date (แจ้งทันที)"""
+    return Q(trigger_date__lte=today) | Q(trigger_date__isnull=True)
+
+
+def counts_for(user_id):
+    """(จำนวนแจ้งเตือนที่ยังไม่อ่าน, จำนวนข้อความแชทที่ยังไม่อ่านรวมทุกห้อง) ของผู้ใช้"""
+    today = timezone.localdate()
+    total_key, chat_key = _keys(user_id, today)
+    cached = cache.get_many([total_key, chat_key])
+    if total_key in cached and chat_key in cached:
+        return cached[total_key], cached[chat_key]
+
+    total = Notification.objects.filter(visible_q(today), user_id=user_id, is_read=False).count()
+    chat = ChatUnread.objects.filter(user_id=user_id).aggregate(n=Sum("unread_count"))["n"] or 0
+    cache.set_many({total_key: total, chat_key: chat}, UNREAD_CACHE_TIMEOUT)
+    return total, chat
+
+
+def invalidate(user_ids):
+    """ให้นับใหม่ครั้งถัดไป (เรียกหลังสร้าง/ลบ/อัปเดตแจ้งเตือนแบบ bulk)"""
+    today = timezone.localdate()
+    keys = [key for uid in set(user_ids) if uid is not None for key in _keys(uid, today)]
+    if keys:
+        cache.delete_many(keys)
+
+
+def _decr(key):
+    try:
+        if cache.decr(key) < 0:
+            cache.delete(key)
+    except ValueError:
+        pass  # ยังไม่มีค่าใน cache -> ครั้งหน้านับใหม่อยู่แล้ว
+
+
+def mark_read(notif):
+    """ทำเครื่องหมายว่าอ่านแล้ว และลดตัวนับถ้าเพิ่งเปลี่ยนจากยังไม่อ่านจริงๆ"""
+    changed = Notification.objects.filter(pk=notif.pk, is_read=False).update(is_read=True)
+    notif.is_read = True
+    today = timezone.localdate()
+    if not changed or (notif.trigger_date is not None and notif.trigger_date > today):
+        return
+    total_key, _ = _keys(notif.user_id, today)
+    _decr(total_key)
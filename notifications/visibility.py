@@ -0,0 +1,45 @@
+"""
+สถานะการเข้าดูโพสต์ที่แจ้งเตือนอ้างถึง (ถูกลบ / ซ่อน / ยังไม่อนุมัติ) — คำนวณทีละชุด
+
+โหลดโพสต์ทั้งหมดที่อ้างถึงด้วย in_bulk ครั้งเดียว (เฉพาะคอลัมน์ที่ใช้ตัดสิน)
+แทนการแตะ n.post ทีละแจ้งเตือน หรือเรียก api_can_view_post ทีละโพสต์
+เจ้าของเทียบด้วย organizer_id กับ pk ของผู้ใช้ จึงไม่ต้อง join ตารางผู้ใช้
+"""
+from post.models import Post
+
+# จำนวนโพสต์สูงสุดต่อหนึ่งคำขอของ api_can_view_posts
+MAX_POST_IDS = 100
+
+_FIELDS = ("status", "is_hidden", "is_deleted", "organizer_id")
+
+
+def post_state(post):
+    """'deleted' | 'hidden' | 'unapproved' | None (ดูได้ตามปกติ)"""
+    if post is None or post.is_deleted:
+        return "deleted"
+    if post.is_hidden:
+        return "hidden"
+    if post.status != Post.Status.APPROVED:
+        return "unapproved"
+    return None
+
+
+def resolve(user, post_ids):
+    """
+    {post_id: {"post_state": ..., "can_view": bool}} ของทุกโพสต์ใน post_ids (query เดียว)
+    โพสต์ที่ไม่พบถือว่าถูกลบ — เฉพาะเจ้าของหรือ superuser ที่ดูโพสต์ที่ไม่ปกติได้
+    """
+    ids = {pid for pid in post_ids if pid is not None}
+    if not ids:
+        return {}
+    posts = Post.objects.only(*_FIELDS).in_bulk(ids)
+
+    result = {}
+    for pid in ids:
+        post = posts.get(pid)
+        state = post_state(post)
+        can_view = state is None or (
+            post is not None and (user.is_superuser or post.organizer_id == user.pk)
+        )
+        result[pid] = {"post_state": state, "can_view": can_view}
+    return result
@@ -0,0 +1,211 @@
+"""
+ดัชนีกริดพิกัดของโพสต์สำหรับแผนที่กิจกรรม
+
+แบ่งโลกเป็นช่องขนาด CELL_DEG องศา แล้วเก็บเลขช่องของแต่ละโพสต์ไว้ใน Post.map_cell (มี index)
+การค้นในกรอบแผนที่ (bbox) จึงกลายเป็น range ของเลขช่องแถวละหนึ่งช่วง แทนการอ่านโพสต์ทุกแถว
+"""
+import datetime
+import heapq
+import math
+
+from django.db.models import Q
+from django.utils import timezone
+
+EARTH_RADIUS_KM = 6371.0
+
+# ขนาดช่องกริด (องศา) — 0.1° ≈ 11 กม.
+CELL_DEG = 0.1
+CELL_ROWS = round(180 / CELL_DEG)
+CELL_COLS = round(360 / CELL_DEG)
+
+# กรอบที่สูงเกินจำนวนแถวนี้ (ซูมออกมาก) ใช้เงื่อนไข lat/lng ตรงๆ แทน (OR หลายสิบช่วงไม่คุ้ม)
+MAX_BBOX_ROWS = 40
+
+# ฟิลด์ที่ต้องใช้สร้างหมุดบนแผนที่
+EVENT_FIELDS = ("id", "title", "location", "event_date", "map_lat", "map_lng")
+
+
+def _row(lat):
+    return min(CELL_ROWS - 1, max(0, math.floor((lat + 90) / CELL_DEG)))
+
+
+def _col(lng):
+    return min(CELL_COLS - 1, max(0, math.floor((lng + 180) / CELL_DEG)))
+
+
+def to_coords(lat, lng):
+    """แปลงพิกัด (อาจเป็น str จากฟอร์ม) เป็น (float, float) หรือ None ถ้าไม่ครบ/ไม่ถูกต้อง"""
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+    # float() รับ "nan" / "inf" ได้ — ต้องตัดทิ้งก่อนถึง math.floor ใน _row/_col
+    if not (math.isfinite(lat) and math.isfinite(lng)):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+def cell_for(lat, lng):
+    """เลขช่องกริดของพิกัด (None ถ้าไม่มีพิกัด)"""
+    coords = to_coords(lat, lng)
+    if coords is None:
+        return None
+    return _row(coords[0]) * CELL_COLS + _col(coords[1])
+
+
+def parse_bbox(raw):
+    """
+    แปลง "west,south,east,north" (รูปแบบ L.LatLngBounds.toBBoxString ของ Leaflet)
+    เป็น tuple (west, south, east, north) หรือ None ถ้ารูปแบบไม่ถูกต้อง
+    """
+    try:
+        west, south, east, north = (float(v) for v in (raw or "").split(","))
+    except ValueError:
+        return None
+    if not all(math.isfinite(v) for v in (west, south, east, north)):
+        return None
+    if south > north:
+        return None
+    return _make_bbox(west, south, east, north)
+
+
+def _make_bbox(west, south, east, north):
+    south, north = max(-90.0, south), min(90.0, north)
+    # ซูมออกจนเห็นโลกเกินหนึ่งรอบ -> ทั้งแนวลองจิจูด
+    if east - west >= 360:
+        west, east = -180.0, 180.0
+    else:
+        west = (west + 180) % 360 - 180
+        east = (east + 180) % 360 - 180
+    return west, south, east, north
+
+
+def radius_bbox(lat, lng, radius_km):
+    """กรอบสี่เหลี่ยมที่ครอบวงกลมรัศมี radius_km รอบจุด (lat, lng)"""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    south, north = lat - dlat, lat + dlat
+    if south <= -90 or north >= 90:
+        # วงกลมครอบขั้วโลก -> ทุกลองจิจูด
+        return _make_bbox(-180.0, south, 180.0, north)
+    dlng = math.degrees(radius_km / (EARTH_RADIUS_KM * math.cos(math.radians(lat))))
+    return _make_bbox(lng - dlng, south, lng + dlng, north)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """ระยะทางบนผิวโลก (กม.) ระหว่างสองพิกัด"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def nearby(posts, lat, lng, radius_km, limit):
+    """
+    โพสต์ใน queryset `posts` ที่อยู่ในรัศมี radius_km รอบ (lat, lng) เรียงจากใกล้ไปไกล
+    คืน list ของ (ระยะทาง กม., post) ไม่เกิน limit รายการ
+
+    กรองด้วยกรอบสี่เหลี่ยมผ่าน index ของ map_cell ก่อน แล้วจึงคำนวณระยะจริงเฉพาะโพสต์ในกรอบ
+    """
+    found = []
+    for post in posts.filter(bbox_q(radius_bbox(lat, lng, radius_km))):
+        d = haversine_km(lat, lng, post.map_lat, post.map_lng)
+        if d <= radius_km:
+            found.append((d, post))
+    return heapq.nsmallest(limit, found, key=lambda item: (item[0], item[1].pk))
+
+
+def _lng_spans(west, east):
+    # กรอบที่คร่อมเส้นแบ่งวัน (west > east) แยกเป็นสองช่วง
+    if west <= east:
+        return [(west, east)]
+    return [(west, 180.0), (-180.0, east)]
+
+
+def bbox_q(bbox):
+    """เงื่อนไข Q ของโพสต์ที่อยู่ในกรอบ bbox (ใช้ map_cell เมื่อกรอบไม่สูงเกินไป)"""
+    west, south, east, north = bbox
+    spans = _lng_spans(west, east)
+
+    exact = Q(map_lat__gte=south, map_lat__lte=north)
+    lng_q = Q()
+    for w, e in spans:
+        lng_q |= Q(map_lng__gte=w, map_lng__lte=e)
+    exact &= lng_q
+
+    row_min, row_max = _row(south), _row(north)
+    if row_max - row_min + 1 > MAX_BBOX_ROWS:
+        return exact
+
+    cells = Q()
+    for row in range(row_min, row_max + 1):
+        base = row * CELL_COLS
+        for w, e in spans:
+            cells |= Q(map_cell__gte=base + _col(w), map_cell__lte=base + _col(e))
+    # ช่องที่ขอบกรอบอาจมีโพสต์นอกกรอบปนอยู่ -> กรองพิกัดจริงซ้ำอีกชั้น
+    return cells & exact
+
+
+def parse_filters(params):
+    """
+    อ่านตัวกรองของแผนที่จาก query string: from / to (YYYY-MM-DD) และ category
+    คืน dict ของค่าที่ normalize แล้ว (ใช้เป็นคีย์ cache ได้) — raise ValueError ถ้ารูปแบบวันที่ผิด
+    """
+    filters = {}
+    for name in ("from", "to"):
+        raw = (params.get(name) or "").strip()
+        if raw:
+            filters[name] = datetime.date.fromisoformat(raw).isoformat()
+    category = (params.get("category") or "").strip()
+    if category:
+        filters["category"] = category
+    return filters
+
+
+def _day_start(iso_date):
+    # เทียบกับ event_date ตรงๆ (ไม่ใช้ __date) เพื่อให้ใช้ index ได้
+    day = datetime.date.fromisoformat(iso_date)
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def filters_q(filters):
+    """เงื่อนไข Q ของตัวกรองจาก parse_filters (ช่วงวันที่รวมวันสุดท้ายด้วย)"""
+    q = Q()
+    if filters.get("from"):
+        q &= Q(event_date__gte=_day_start(filters["from"]))
+    if filters.get("to"):
+        q &= Q(event_date__lt=_day_start(filters["to"]) + datetime.timedelta(days=1))
+    if filters.get("category"):
+        q &= Q(category=filters["category"])
+    return q
+
+
+def map_posts(filters=None):
+    """
+    โพสต์ที่แสดงบนแผนที่ได้ (อนุมัติแล้ว ไม่ซ่อน ไม่ลบ มีพิกัด) อ่านเฉพาะฟิลด์ที่ใช้
+    (ตรงกับ index post_map_visible_cell_idx / post_visible_date_idx ของ Post)
+    """
+    from .models import Post
+
+    return Post.objects.filter(
+        filters_q(filters or {}),
+        status=Post.Status.APPROVED,
+        is_hidden=False,
+        is_deleted=False,
+        map_lat__isnull=False,
+        map_lng__isnull=False,
+    ).only(*EVENT_FIELDS)
+
+
+def event_dict(post):
+    """ข้อมูลหมุดหนึ่งโพสต์ (รูปแบบเดียวกับ events_json เดิม)"""
+    return {
+        "id": post.id,
+        "title": post.title,
+        "lat": float(post.map_lat),
+        "lng": float(post.map_lng),
+        "location": post.location or "",
+        "date": post.event_date.strftime("%d %b %Y") if post.event_date else "",
+    }
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:36
+
+from django.db import migrations, models
+
+
+def fill_active_count(apps, schema_editor):
+    Post = apps.get_model("post", "Post")
+    ActivityRegistration = apps.get_model("activity_register", "ActivityRegistration")
+    rows = (
+        ActivityRegistration.objects.filter(status="ACTIVE")
+        .values("post_id")
+        .annotate(n=models.Count("id"))
+    )
+    for row in rows:
+        Post.objects.filter(pk=row["post_id"]).update(active_count=row["n"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0004_alter_post_slots_available'),
+        ('activity_register', '0004_activityregistration_nickname'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='active_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='จำนวนผู้สมัคร'),
+        ),
+        migrations.RunPython(fill_active_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:46
+
+import math
+
+from django.db import migrations, models
+
+# ค่าเดียวกับ post.geo ณ ตอนสร้าง migration
+CELL_DEG = 0.1
+CELL_ROWS = 1800
+CELL_COLS = 3600
+
+
+def fill_map_cell(apps, schema_editor):
+    Post = apps.get_model("post", "Post")
+    rows = Post.objects.filter(map_lat__isnull=False, map_lng__isnull=False).values_list("id", "map_lat", "map_lng")
+    for pk, lat, lng in rows:
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            continue
+        row = min(CELL_ROWS - 1, max(0, math.floor((lat + 90) / CELL_DEG)))
+        col = min(CELL_COLS - 1, max(0, math.floor((lng + 180) / CELL_DEG)))
+        Post.objects.filter(pk=pk).update(map_cell=row * CELL_COLS + col)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0005_post_active_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='map_cell',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='ช่องกริดแผนที่'),
+        ),
+        migrations.RunPython(fill_map_cell, migrations.RunPython.noop),
+    ]
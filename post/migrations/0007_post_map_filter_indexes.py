@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0006_post_map_cell'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', 'is_hidden', 'is_deleted', 'event_date'], name='post_visible_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', 'is_hidden', 'is_deleted', 'map_cell', 'event_date'], name='post_map_visible_cell_idx'),
+        ),
+    ]
@@ -69,6 +69,7 @@
 
 from django.db import models
 from django.conf import settings  # ✅ รองรับ CustomUser
+from .geo import cell_for
 
 
 class Post(models.Model):
@@ -100,6 +101,10 @@ class Post(models.Model):
     # ✅ จำนวนที่รับสมัคร
     slots_available = models.PositiveIntegerField(verbose_name="จำนวนที่รับสมัคร")
 
+    # ✅ จำนวนผู้สมัครสถานะ ACTIVE (อัปเดตด้วย F() จาก ActivityRegistration — ห้ามแก้ตรงๆ)
+    #    ถ้าค่าคลาดเคลื่อน ใช้คำสั่ง reconcile_active_counts คำนวณใหม่
+    active_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="จำนวนผู้สมัคร")
+
     # ✅ ค่าใช้จ่าย (ไม่กรอก = ไม่มีค่าใช้จ่าย)
     fee = models.PositiveIntegerField(
         blank=True,
@@ -121,6 +126,11 @@ class Post(models.Model):
     map_lat = models.FloatField(blank=True, null=True, verbose_name="ละติจูด")
     map_lng = models.FloatField(blank=True, null=True, verbose_name="ลองจิจูด")
 
+    # ✅ เลขช่องกริดของพิกัด (คำนวณตอน save — ดู post.geo) ใช้ค้นหมุดในกรอบแผนที่ผ่าน index
+    map_cell = models.PositiveIntegerField(
+        null=True, blank=True, editable=False, db_index=True, verbose_name="ช่องกริดแผนที่"
+    )
+
     # ✅ เลือกว่าจะสร้างกลุ่มแชตให้กิจกรรมนี้หรือไม่ (ใช้ต่อในอนาคต)
     create_group = models.BooleanField(
         default=False,
@@ -159,17 +169,53 @@ class Post(models.Model):
         ordering = ['-created_at']
         verbose_name = "โพสต์กิจกรรม"
         verbose_name_plural = "โพสต์กิจกรรมทั้งหมด"
+        indexes = [
+            # ✅ โพสต์ที่แสดงได้ + ช่วงวันที่จัด (เช่น "กิจกรรมที่กำลังจะมาถึง")
+            models.Index(
+                fields=["status", "is_hidden", "is_deleted", "event_date"],
+                name="post_visible_date_idx",
+            ),
+            # ✅ โพสต์ที่แสดงได้ในกรอบแผนที่ (ช่วงของ map_cell) แล้วกรองวันที่จาก index เดียวกัน
+            models.Index(
+                fields=["status", "is_hidden", "is_deleted", "map_cell", "event_date"],
+                name="post_map_visible_cell_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.get_status_display()})"
 
+    # ✅ ค่าที่โหลดมาจากฐานข้อมูล {attname: value} — ให้ signal เทียบว่า save นี้เปลี่ยนอะไรโดยไม่ต้อง SELECT ซ้ำ
+    _loaded_values = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # ✅ save แบบเต็มของโพสต์ที่มีอยู่แล้ว จะไม่เขียน active_count ทับ
+        #    (ค่าในหน่วยความจำอาจเก่ากว่าที่ ActivityRegistration อัปเดตไว้)
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != "active_count" and f.attname not in deferred
+            ]
+
+        # ✅ ช่องกริดแผนที่ตามพิกัดล่าสุด (ข้ามถ้าพิกัดไม่ได้ถูกโหลดมา)
+        if not {"map_lat", "map_lng"} & self.get_deferred_fields():
+            self.map_cell = cell_for(self.map_lat, self.map_lng)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "map_cell" not in update_fields \
+                    and {"map_lat", "map_lng"} & set(update_fields):
+                kwargs["update_fields"] = list(update_fields) + ["map_cell"]
+        super().save(*args, **kwargs)
+
     # ✅ helper เล็กน้อย (ไม่กระทบที่อื่น)
     def active_registrations_count(self):
-        # ActivityRegistration มี status เพิ่มในโค้ดด้านล่าง
-        try:
-            return self.registrations.filter(status="ACTIVE").count()
-        except Exception:
-            return self.registrations.count()
+        return self.active_count
 
     def is_full(self):
         if self.slots_available == 0:
@@ -3,14 +3,12 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import HttpResponseForbidden, JsonResponse
 from django.views.decorators.http import require_POST
-from django.core.serializers.json import DjangoJSONEncoder
 from django.db.models import Avg
 from .models import Post
 from .forms import PostForm
 from activity_register.models import ActivityReview, ActivityRegistration
 from chat.models import ChatRoom, ChatMembership
 from notifications.signals import notify_admins_new_post
-import json
 
 
 # ------------------------------
@@ -332,34 +330,10 @@ def saved_posts_view(request):
 # ------------------------------
 @login_required
 def map_overview(request):
-    posts = Post.objects.filter(
-        status=Post.Status.APPROVED,
-        is_hidden=False,
-        is_deleted=False,
-        map_lat__isnull=False,
-        map_lng__isnull=False,
-    )
-
-    events = []
-    for p in posts:
-        try:
-            lat = float(p.map_lat)
-            lng = float(p.map_lng)
-        except (TypeError, ValueError):
-            continue
-
-        events.append({
-            "id": p.id,
-            "title": p.title,
-            "lat": lat,
-            "lng": lng,
-            "location": p.location or "",
-            "date": p.event_date.strftime("%d %b %Y") if p.event_date else "",
-        })
-
+    # หมุดโหลดตามกรอบแผนที่ผ่าน home:map_events (ไม่ฝังทุกโพสต์ลงในหน้า)
     context = {
-        "events_json": json.dumps(events, cls=DjangoJSONEncoder, ensure_ascii=False),
         "enable_geolocation": True,
+        "categories": [c[0] for c in Post.CATEGORY_CHOICES],
     }
     return render(request, "home/map.html", context)
 
@@ -0,0 +1,43 @@
+import math
+
+from django.db.models import Count
+
+from .models import PostTrigram
+from .tokenizer import trigrams
+
+# สัดส่วน trigram ของคำค้นที่ต้องพบในโพสต์ จึงจะนับว่าใกล้เคียง
+FUZZY_THRESHOLD = 0.45
+
+# จำนวนผลลัพธ์สูงสุดต่อคำค้น (กันไม่ให้คำสั้นๆ ดึงทั้งตารางกลับมา)
+FUZZY_LIMIT = 100
+
+
+def fuzzy_scores(tokens, posts=None, threshold=FUZZY_THRESHOLD, limit=FUZZY_LIMIT):
+    """
+    คืน dict {post_id: similarity} ของโพสต์ที่ใกล้เคียงกับคำค้น (ใช้ค่าสูงสุดระหว่างคำ)
+    posts: queryset ของโพสต์ที่แสดงได้ (หมวดหมู่/สถานะ) — กรองก่อนตัด limit
+    ไม่งั้นโพสต์ที่ซ่อน/อยู่หมวดอื่นอาจกิน limit จนโพสต์ที่แสดงได้หลุดไป
+
+    similarity = จำนวน trigram ของคำค้นที่พบในโพสต์ / จำนวน trigram ทั้งหมดของคำค้น
+    นับในฐานข้อมูลด้วย GROUP BY บน index ของ gram จึงครอบคลุมทุกโพสต์
+    """
+    scores = {}
+    for t in tokens:
+        grams = trigrams(t)
+        if not grams:
+            continue
+        min_hits = max(1, math.ceil(threshold * len(grams)))
+        rows = PostTrigram.objects.filter(gram__in=grams)
+        if posts is not None:
+            rows = rows.filter(post_id__in=posts.values("id"))
+        rows = (
+            rows.values("post_id")
+            .annotate(hits=Count("id"))
+            .filter(hits__gte=min_hits)
+            .order_by("-hits")[:limit]
+        )
+        for r in rows:
+            sim = r["hits"] / len(grams)
+            if sim > scores.get(r["post_id"], 0):
+                scores[r["post_id"]] = sim
+    return scores
@@ -0,0 +1,92 @@
+from django.db import transaction
+
+from post.models import Post
+from .models import PostToken, PostTrigram
+from .ranking import FIELD_WEIGHTS
+from .tokenizer import index_terms, trigrams
+
+# ฟิลด์ของ Post ที่มีผลกับดัชนี (ใช้ตัดสินว่า save(update_fields=...) ต้อง index ใหม่หรือไม่)
+INDEXED_POST_FIELDS = {
+    "title", "description", "location", "event_date", "organizer",
+    "status", "is_hidden", "is_deleted",
+}
+
+
+def is_indexable(post):
+    """เก็บลงดัชนีเฉพาะโพสต์ที่แสดงบน feed ได้ (อนุมัติแล้ว ไม่ซ่อน ไม่ลบ)"""
+    return (
+        post.status == Post.Status.APPROVED
+        and not post.is_hidden
+        and not post.is_deleted
+    )
+
+
+def _post_fields(post):
+    organizer = post.organizer
+    return {
+        PostToken.Field.TITLE: post.title,
+        PostToken.Field.DESCRIPTION: post.description,
+        PostToken.Field.LOCATION: post.location,
+        PostToken.Field.FIRST_NAME: organizer.first_name,
+        PostToken.Field.LAST_NAME: organizer.last_name,
+        PostToken.Field.EMAIL: organizer.email,
+    }
+
+
+def build_tokens(post):
+    """สร้างแถว PostToken (ยังไม่บันทึก) ของโพสต์หนึ่งโพสต์"""
+    rows = []
+    for field, text in _post_fields(post).items():
+        weight = FIELD_WEIGHTS[field]
+        for term in index_terms(text):
+            rows.append(PostToken(post_id=post.pk, field=field, token=term, weight=weight))
+    if post.event_date:
+        rows.append(PostToken(
+            post_id=post.pk,
+            field=PostToken.Field.YEAR,
+            token=str(post.event_date.year),
+            weight=FIELD_WEIGHTS[PostToken.Field.YEAR],
+        ))
+    return rows
+
+
+def build_trigrams(post):
+    """สร้างแถว PostTrigram (ยังไม่บันทึก) จากชื่อกิจกรรม รายละเอียด สถานที่ และชื่อผู้จัด"""
+    organizer = post.organizer
+    text = " ".join(filter(None, [
+        post.title, post.description, post.location,
+        organizer.first_name, organizer.last_name,
+    ]))
+    return [PostTrigram(post_id=post.pk, gram=g) for g in trigrams(text)]
+
+
+def _save_rows(post):
+    # ignore_conflicts: collation ของ MySQL อาจมองว่า token/trigram สองตัวเท่ากัน (เช่นต่างกันแค่ accent)
+    PostToken.objects.bulk_create(build_tokens(post), batch_size=1000, ignore_conflicts=True)
+    PostTrigram.objects.bulk_create(build_trigrams(post), batch_size=1000, ignore_conflicts=True)
+
+
+def index_post(post):
+    """index โพสต์ใหม่ทั้งโพสต์ (ลบ token เดิมทิ้งก่อน) — โพสต์ที่แสดงไม่ได้จะถูกนำออกจากดัชนี"""
+    with transaction.atomic():
+        PostToken.objects.filter(post_id=post.pk).delete()
+        PostTrigram.objects.filter(post_id=post.pk).delete()
+        if is_indexable(post):
+            _save_rows(post)
+
+
+def rebuild_index(batch_size=200):
+    """ล้างดัชนีและสร้างใหม่จากโพสต์ทั้งหมด คืนจำนวนโพสต์ที่ถูก index"""
+    posts = (
+        Post.objects.filter(status=Post.Status.APPROVED, is_hidden=False, is_deleted=False)
+        .select_related("organizer")
+        .order_by("pk")
+    )
+    PostToken.objects.all().delete()
+    PostTrigram.objects.all().delete()
+    count = 0
+    for post in posts.iterator(chunk_size=batch_size):
+        with transaction.atomic():
+            _save_rows(post)
+        count += 1
+    return count
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from search.indexer import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "ล้างและสร้างดัชนีค้นหาโพสต์ (search.PostToken) ใหม่ทั้งหมด"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="จำนวนโพสต์ที่อ่านจากฐานข้อมูลต่อรอบ",
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_index(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"index โพสต์แล้ว {count} โพสต์"))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('post', '0004_alter_post_slots_available'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('title', 'ชื่อกิจกรรม'), ('description', 'รายละเอียด'), ('location', 'สถานที่'), ('first_name', 'ชื่อผู้จัด'), ('last_name', 'นามสกุลผู้จัด'), ('email', 'อีเมลผู้จัด'), ('year', 'ปีที่จัดกิจกรรม')], max_length=16)),
+                ('token', models.CharField(max_length=32)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='post.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'field'], name='search_token_field_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'field', 'token'), name='uniq_post_field_token')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:41
+
+from django.db import migrations, models
+
+FIELD_WEIGHTS = {
+    "email": 50,
+    "first_name": 40,
+    "last_name": 40,
+    "title": 10,
+    "description": 5,
+    "location": 3,
+    "year": 10,
+}
+
+
+def fill_weights(apps, schema_editor):
+    PostToken = apps.get_model("search", "PostToken")
+    for field, weight in FIELD_WEIGHTS.items():
+        PostToken.objects.filter(field=field).update(weight=weight)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posttoken',
+            name='weight',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_weights, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0004_alter_post_slots_available'),
+        ('search', '0002_posttoken_weight'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gram', models.CharField(max_length=3)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_trigrams', to='post.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['gram'], name='search_trigram_gram_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'gram'), name='uniq_post_gram')],
+            },
+        ),
+    ]
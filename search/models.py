@@ -0,0 +1,57 @@
+from django.db import models
+
+from post.models import Post
+
+
+class PostToken(models.Model):
+    """
+    posting list ของดัชนีค้นหา: 1 แถว = 1 token ที่พบในฟิลด์หนึ่งของโพสต์
+    (เก็บเฉพาะโพสต์ที่แสดงบน feed ได้ — ดู search.indexer.is_indexable)
+    """
+
+    class Field(models.TextChoices):
+        TITLE = "title", "ชื่อกิจกรรม"
+        DESCRIPTION = "description", "รายละเอียด"
+        LOCATION = "location", "สถานที่"
+        FIRST_NAME = "first_name", "ชื่อผู้จัด"
+        LAST_NAME = "last_name", "นามสกุลผู้จัด"
+        EMAIL = "email", "อีเมลผู้จัด"
+        YEAR = "year", "ปีที่จัดกิจกรรม"
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="search_tokens")
+    field = models.CharField(max_length=16, choices=Field.choices)
+    token = models.CharField(max_length=32)
+    # น้ำหนักความเกี่ยวข้องของฟิลด์ คำนวณไว้ตอน index (ดู search.ranking.FIELD_WEIGHTS)
+    weight = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["post", "field", "token"], name="uniq_post_field_token"),
+        ]
+        indexes = [
+            models.Index(fields=["token", "field"], name="search_token_field_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} - {self.field} - {self.token}"
+
+
+class PostTrigram(models.Model):
+    """
+    ดัชนี trigram ของโพสต์ (จากชื่อกิจกรรม รายละเอียด สถานที่ และชื่อผู้จัด)
+    ใช้ค้นหาแบบทนคำพิมพ์ผิดเมื่อไม่พบผลจาก PostToken
+    """
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="search_trigrams")
+    gram = models.CharField(max_length=3)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["post", "gram"], name="uniq_post_gram"),
+        ]
+        indexes = [
+            models.Index(fields=["gram"], name="search_trigram_gram_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} - {self.gram}"
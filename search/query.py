@@ -0,0 +1,62 @@
+from .models import PostToken
+from .tokenizer import query_terms
+
+# ฟิลด์ข้อความที่ค้นแบบ "มีคำนี้อยู่" (ปีค้นแบบตรงตัวแยกต่างหาก)
+TEXT_FIELDS = [
+    PostToken.Field.TITLE,
+    PostToken.Field.DESCRIPTION,
+    PostToken.Field.LOCATION,
+    PostToken.Field.FIRST_NAME,
+    PostToken.Field.LAST_NAME,
+    PostToken.Field.EMAIL,
+]
+
+
+def _ids_for_term(term, fields):
+    # istartswith -> LIKE 'term%' ซึ่ง MySQL ใช้ index ได้ และเทียบตาม collation เดียวกับ icontains เดิม
+    return (
+        PostToken.objects.filter(token__istartswith=term, field__in=fields)
+        .values_list("post_id", "field")
+        .distinct()
+    )
+
+
+def _match_by_field(token, fields=TEXT_FIELDS):
+    """
+    คืน dict {field: set(post_id)} ของโพสต์ที่มี token อยู่ในฟิลด์นั้น
+
+    token ที่มีเครื่องหมายคั่น (เช่น "ม.ค.") จะถูกแยกเป็นหลายคำ
+    และทุกคำต้องพบในฟิลด์เดียวกัน
+    """
+    result = None
+    for term in query_terms(token):
+        found = {}
+        for post_id, field in _ids_for_term(term, fields):
+            found.setdefault(field, set()).add(post_id)
+        if result is None:
+            result = found
+        else:
+            result = {
+                f: ids & found[f]
+                for f, ids in result.items()
+                if f in found and ids & found[f]
+            }
+        if not result:
+            return {}
+    return result or {}
+
+
+def matching_post_ids(tokens):
+    """
+    id ของโพสต์ที่ตรงกับคำค้นอย่างน้อยหนึ่งคำ (OR ระหว่างคำ เหมือนเงื่อนไข icontains เดิม)
+    """
+    ids = set()
+    for t in tokens:
+        for field_ids in _match_by_field(t).values():
+            ids |= field_ids
+        if t.isdigit() and len(t) == 4:
+            ids |= set(
+                PostToken.objects.filter(field=PostToken.Field.YEAR, token=t)
+                .values_list("post_id", flat=True)
+            )
+    return ids
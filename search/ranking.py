@@ -0,0 +1,113 @@
+from collections import defaultdict
+
+from django.db.models import Max
+
+from .models import PostToken
+from .query import TEXT_FIELDS, _match_by_field
+from .tokenizer import query_terms
+
+# น้ำหนักของแต่ละฟิลด์ (เก็บไว้ใน PostToken.weight ตอน index)
+FIELD_WEIGHTS = {
+    PostToken.Field.EMAIL: 50,
+    PostToken.Field.FIRST_NAME: 40,
+    PostToken.Field.LAST_NAME: 40,
+    PostToken.Field.TITLE: 10,
+    PostToken.Field.DESCRIPTION: 5,
+    PostToken.Field.LOCATION: 3,
+    PostToken.Field.YEAR: 10,
+}
+
+# คะแนนพิเศษเมื่อคำค้นทั้งวลีตรงกับชื่อ/อีเมลผู้จัด
+PHRASE_BONUS = 10000
+
+NAME_FIELDS = [PostToken.Field.FIRST_NAME, PostToken.Field.LAST_NAME]
+
+
+def _token_weights(token):
+    """
+    คะแนนของคำค้นหนึ่งคำต่อโพสต์ = น้ำหนักสูงสุดของฟิลด์ที่พบคำนั้น
+    (เหมือน Case/When เดิมที่หยุดที่เงื่อนไขแรกที่ตรง: email > ชื่อ > title > description > location)
+    """
+    terms = query_terms(token)
+    if not terms:
+        return {}
+    if len(terms) == 1:
+        rows = (
+            PostToken.objects.filter(token__istartswith=terms[0], field__in=TEXT_FIELDS)
+            .values("post_id")
+            .annotate(w=Max("weight"))
+        )
+        return {r["post_id"]: r["w"] for r in rows}
+
+    weights = {}
+    for field, ids in _match_by_field(token).items():
+        for post_id in ids:
+            weights[post_id] = max(weights.get(post_id, 0), FIELD_WEIGHTS[field])
+    return weights
+
+
+def _ids_in(term, fields):
+    ids = set()
+    for field_ids in _match_by_field(term, fields).values():
+        ids |= field_ids
+    return ids
+
+
+def _phrase_bonus_sets(phrase):
+    """
+    ชุดของโพสต์ที่ได้คะแนนพิเศษจากวลีค้นหาทั้งวลี (อีเมล / ชื่อ-นามสกุลผู้จัด)
+    แต่ละชุดให้ PHRASE_BONUS แยกกัน เหมือน Case/When เดิมที่บวกแยกทีละเงื่อนไข
+    """
+    sets = []
+    if "@" in phrase:
+        sets.append(_ids_in(phrase, [PostToken.Field.EMAIL]))
+
+    parts = phrase.split()
+    if len(parts) >= 2:
+        first, last = parts[0], parts[-1]
+        first_as_first = _ids_in(first, [PostToken.Field.FIRST_NAME])
+        last_as_last = _ids_in(last, [PostToken.Field.LAST_NAME])
+        last_as_first = _ids_in(last, [PostToken.Field.FIRST_NAME])
+        first_as_last = _ids_in(first, [PostToken.Field.LAST_NAME])
+        sets.append((first_as_first & last_as_last) | (last_as_first & first_as_last))
+    elif len(parts) == 1:
+        # ค้นหาคำเดียว ขอแค่ตรงกับส่วนหนึ่งของชื่อหรือนามสกุลก็ได้คะแนนเต็ม
+        sets.append(_ids_in(phrase, NAME_FIELDS))
+    return sets
+
+
+def score_posts(tokens, phrase=""):
+    """
+    คืน dict {post_id: score} ของโพสต์ที่ตรงกับคำค้นอย่างน้อยหนึ่งคำ
+
+    score = ผลรวมของน้ำหนักฟิลด์ต่อคำ + คะแนนปี (คำที่เป็นปี 4 หลัก) + คะแนนพิเศษของวลี
+    """
+    scores = defaultdict(int)
+    for t in tokens:
+        for post_id, w in _token_weights(t).items():
+            scores[post_id] += w
+        if t.isdigit() and len(t) == 4:
+            year_ids = PostToken.objects.filter(
+                field=PostToken.Field.YEAR, token=t
+            ).values_list("post_id", flat=True)
+            for post_id in year_ids:
+                scores[post_id] += FIELD_WEIGHTS[PostToken.Field.YEAR]
+
+    phrase = (phrase or "").strip()
+    if scores and phrase:
+        for ids in _phrase_bonus_sets(phrase):
+            for post_id in ids:
+                # คะแนนพิเศษให้เฉพาะโพสต์ที่ตรงกับคำค้นอยู่แล้ว (ไม่เพิ่มผลลัพธ์ใหม่)
+                if post_id in scores:
+                    scores[post_id] += PHRASE_BONUS
+    return dict(scores)
+
+
+def rank_post_keys(posts, scores):
+    """
+    คืนคีย์ (score, created_at, id) ของโพสต์ใน queryset `posts` เรียงจากมากไปน้อย
+    (ใช้เป็น cursor ของการแบ่งหน้าผลค้นหาได้โดยตรง)
+    """
+    rows = posts.filter(id__in=list(scores)).values_list("id", "created_at")
+    return sorted(((scores[pk], created_at, pk) for pk, created_at in rows), reverse=True)
+
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from post.models import Post
+from .indexer import INDEXED_POST_FIELDS, index_post
+
+# ฟิลด์ของผู้ใช้ที่ถูก index ไว้กับโพสต์ของผู้จัด
+INDEXED_USER_FIELDS = {"first_name", "last_name", "email"}
+
+
+@receiver(post_save, sender=Post)
+def reindex_post(sender, instance: Post, update_fields=None, **kwargs):
+    """
+    อัปเดตดัชนีค้นหาเมื่อโพสต์ถูกบันทึก
+    (การลบโพสต์จริงไม่ต้องทำอะไร เพราะ PostToken ถูกลบตาม on_delete=CASCADE)
+    """
+    if update_fields and not (set(update_fields) & INDEXED_POST_FIELDS):
+        return
+    index_post(instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_organizer_posts(sender, instance, created, update_fields=None, **kwargs):
+    """ชื่อ/อีเมลผู้จัดถูก index อยู่กับโพสต์ จึงต้อง index โพสต์ของผู้ใช้นั้นใหม่"""
+    if created:
+        return
+    # เช่น login อัปเดตเฉพาะ last_login -> ไม่ต้อง index ใหม่
+    if update_fields and not (set(update_fields) & INDEXED_USER_FIELDS):
+        return
+    posts = Post.objects.filter(
+        organizer=instance,
+        status=Post.Status.APPROVED,
+        is_hidden=False,
+        is_deleted=False,
+    )
+    for post in posts:
+        index_post(post)
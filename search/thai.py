@@ -0,0 +1,117 @@
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+
+# พจนานุกรมคำที่ใช้ตัดคำ (หนึ่งบรรทัดต่อหนึ่งคำ)
+WORDS_FILE = Path(__file__).resolve().parent / "data" / "thai_words.txt"
+
+# สระ/วรรณยุกต์ที่ต้องเกาะกับพยัญชนะตัวหน้า — ห้ามตัดคำก่อนตัวอักษรเหล่านี้
+FOLLOWING_CHARS = set(
+    "ะัาำิีึืฺุู"
+    "ๅ็่้๊๋์ํ๎"
+)
+
+# สระหน้า (เ แ โ ใ ไ) ต้องอยู่กับพยัญชนะตัวถัดไป — ห้ามตัดคำหลังตัวอักษรเหล่านี้
+LEADING_VOWELS = set("เแโใไ")
+
+# ไม้ไต่คู้ วรรณยุกต์ทั้ง 4 และการันต์ — ตัดทิ้งตอนเทียบคำ (ค้น "ปา" ก็เจอ "ป่า")
+TONE_MARKS = set("็่้๊๋์")
+
+# "ํ" (+ วรรณยุกต์) + "า" ที่พิมพ์แยกกัน -> วรรณยุกต์ + "ำ" (เช่น น ํ ้ า -> น้ำ)
+SARA_AM_RE = re.compile("\u0e4d([\u0e48-\u0e4b]?)\u0e32")
+
+
+def is_thai(text):
+    return any("\u0e00" <= ch <= "\u0e7f" for ch in text)
+
+
+@lru_cache(maxsize=1)
+def dictionary():
+    """โหลดพจนานุกรมครั้งเดียวต่อ process คืน (ชุดคำ, ความยาวคำที่ยาวที่สุด)"""
+    words = set()
+    with open(WORDS_FILE, encoding="utf-8") as fh:
+        for line in fh:
+            word = normalize(line.strip())
+            if word and not word.startswith("#"):
+                words.add(word)
+    return frozenset(words), max((len(w) for w in words), default=0)
+
+
+def normalize(text):
+    """
+    ปรับรูปแบบการพิมพ์ให้ตรงกัน: ตัวพิมพ์เล็ก และรวม "ํ" + "า" ที่พิมพ์แยกกันเป็น "ำ"
+    (ใช้ NFKC ไม่ได้ เพราะจะแยก "ำ" ออกเป็นสองตัวแทน)
+    """
+    return SARA_AM_RE.sub("\\1\u0e33", text.lower())
+
+
+def _can_break(text, i):
+    if i <= 0 or i >= len(text):
+        return True
+    return text[i] not in FOLLOWING_CHARS and text[i - 1] not in LEADING_VOWELS
+
+
+def segment(text):
+    """
+    ตัดคำภาษาไทยแบบ maximal matching ด้วยพจนานุกรม
+
+    เลือกการตัดที่มีตัวอักษรนอกพจนานุกรมน้อยที่สุด แล้วจึงใช้จำนวนคำน้อยที่สุด
+    ส่วนที่ไม่รู้จักจะถูกรวมเป็นคำเดียวตามขอบพยางค์ (ไม่ตัดกลางสระ/วรรณยุกต์)
+    """
+    if not text:
+        return []
+    words, max_len = dictionary()
+    n = len(text)
+    # best[i] = (จำนวนตัวอักษรที่ไม่รู้จัก, จำนวนคำ, ตำแหน่งเริ่มคำสุดท้าย, คำสุดท้ายรู้จักหรือไม่)
+    best = [None] * (n + 1)
+    best[0] = (0, 0, 0, True)
+    for i in range(n):
+        if best[i] is None or not _can_break(text, i):
+            continue
+        unknown, count = best[i][0], best[i][1]
+        for j in range(i + 1, min(n, i + max_len) + 1):
+            if text[i:j] in words and _can_break(text, j):
+                cand = (unknown, count + 1, i, True)
+                if best[j] is None or cand[:2] < best[j][:2]:
+                    best[j] = cand
+        # ตัวอักษรที่ไม่อยู่ในพจนานุกรม: ข้ามไปจนถึงตำแหน่งตัดคำได้ถัดไป
+        j = i + 1
+        while not _can_break(text, j):
+            j += 1
+        cand = (unknown + (j - i), count + 1, i, False)
+        if best[j] is None or cand[:2] < best[j][:2]:
+            best[j] = cand
+
+    pieces = []
+    i = n
+    while i > 0:
+        start, known = best[i][2], best[i][3]
+        pieces.append((text[start:i], known))
+        i = start
+    pieces.reverse()
+
+    # รวมชิ้นที่ไม่รู้จักที่อยู่ติดกันเป็นคำเดียว
+    out = []
+    prev_known = True
+    for piece, known in pieces:
+        if not known and not prev_known:
+            out[-1] += piece
+        else:
+            out.append(piece)
+        prev_known = known
+    return out
+
+
+def fold(word):
+    """
+    ตัดเครื่องหมายที่มักพิมพ์ผิด/ไม่พิมพ์ออก: วรรณยุกต์/การันต์ของไทย และ accent ของอักษรละติน
+    """
+    out = []
+    for ch in word:
+        if "\u0e00" <= ch <= "\u0e7f":
+            if ch not in TONE_MARKS:
+                out.append(ch)
+            continue
+        out.extend(c for c in unicodedata.normalize("NFKD", ch) if not unicodedata.combining(c))
+    return "".join(out)
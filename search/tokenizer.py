@@ -0,0 +1,163 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from . import thai
+
+# ความยาวสูงสุดของ token ที่เก็บในดัชนี (ตรงกับ PostToken.token.max_length)
+MAX_TOKEN_LENGTH = 32
+
+# \w ของ Python ไม่นับสระ/วรรณยุกต์ไทย (เช่น ิ ั ่ ้) เป็นตัวอักษร ทำให้คำไทยถูกตัดกลางคำ
+# จึงรวมช่วง Unicode ภาษาไทยทั้งบล็อกเข้าไปด้วย
+WORD_RE = re.compile(r"[\w\u0e00-\u0e7f]+")
+
+
+# ---------------------------------------------------------------------------
+# pipeline แปลงข้อความเป็นคำ: แต่ละขั้นรับ list ของข้อความ คืน list ใหม่
+# ใช้ทั้งตอน index และตอนแปลงคำค้น จึงได้ token รูปเดียวกันทั้งสองฝั่ง
+# (เปลี่ยนลำดับ/เพิ่มขั้นได้ด้วย settings.SEARCH_TOKEN_PIPELINE แล้วรัน rebuild_search_index)
+# ---------------------------------------------------------------------------
+
+def normalize_step(parts):
+    """ตัวพิมพ์เล็ก + รวมรูปการพิมพ์ที่ต่างกันของตัวอักษรเดียวกัน"""
+    return [thai.normalize(p) for p in parts]
+
+
+def split_step(parts):
+    """แยกตามตัวอักษร/ตัวเลข (รวมภาษาไทย) — เครื่องหมายวรรคตอนและช่องว่างเป็นตัวคั่น"""
+    return [w for p in parts for w in WORD_RE.findall(p)]
+
+
+def segment_step(parts):
+    """ตัดคำภาษาไทยที่เขียนติดกันด้วยพจนานุกรม (คำที่ไม่มีอักษรไทยผ่านไปตามเดิม)"""
+    out = []
+    for p in parts:
+        out.extend(thai.segment(p) if thai.is_thai(p) else [p])
+    return out
+
+
+def fold_step(parts):
+    """ตัดวรรณยุกต์/การันต์และ accent ออก (ทำหลังตัดคำ เพราะพจนานุกรมเก็บคำรูปเต็ม)"""
+    return [f for f in (thai.fold(p) for p in parts) if f]
+
+
+DEFAULT_TOKEN_PIPELINE = [
+    "search.tokenizer.normalize_step",
+    "search.tokenizer.split_step",
+    "search.tokenizer.segment_step",
+    "search.tokenizer.fold_step",
+]
+
+
+@lru_cache(maxsize=1)
+def token_pipeline():
+    paths = getattr(settings, "SEARCH_TOKEN_PIPELINE", DEFAULT_TOKEN_PIPELINE)
+    return tuple(import_string(path) for path in paths)
+
+
+def words(text):
+    """แยกข้อความเป็นคำ (ตัวพิมพ์เล็ก ตัดคำไทย ตัดวรรณยุกต์) ผ่าน token pipeline"""
+    if not text:
+        return []
+    parts = [text]
+    for step in token_pipeline():
+        parts = step(parts)
+    return parts
+
+
+def suffixes(word):
+    """
+    คืน suffix ทุกตัวของคำ (ตัดให้ยาวไม่เกิน MAX_TOKEN_LENGTH)
+
+    การเก็บ suffix ทำให้ค้นหาแบบ "คำที่ค้นเป็นส่วนหนึ่งของคำ" (แบบ icontains เดิม)
+    ได้ด้วยการเทียบ prefix ของ token ซึ่งใช้ index ได้ — คำไทยถูกตัดคำก่อนแล้ว
+    suffix จึงสั้นและมีจำนวนน้อย
+    """
+    return {word[i:i + MAX_TOKEN_LENGTH] for i in range(len(word))}
+
+
+def index_terms(text):
+    """token ทั้งหมดที่ต้องเก็บลงดัชนีสำหรับข้อความหนึ่งฟิลด์"""
+    terms = set()
+    for w in words(text):
+        terms |= suffixes(w)
+    return terms
+
+
+def query_terms(token):
+    """แปลงคำค้นหนึ่งคำเป็น prefix สำหรับเทียบกับดัชนี (ทุกตัวต้องพบในฟิลด์เดียวกัน)"""
+    return [w[:MAX_TOKEN_LENGTH] for w in words(token)]
+
+
+def trigrams(text):
+    """
+    ชุด trigram ของตัวอักษรในแต่ละคำ (เติมช่องว่างหน้า 2 ตัว หลัง 1 ตัวแบบ pg_trgm)
+    ใช้กับการค้นหาแบบทนคำพิมพ์ผิด
+    """
+    grams = set()
+    for w in words(text):
+        padded = f"  {w} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+# ---------------------------------------------------------------------------
+# การแปลงคำค้นของผู้ใช้ (เดือนไทย / ปี พ.ศ.)
+# ---------------------------------------------------------------------------
+
+# ชื่อเดือนไทย/ตัวย่อ -> (เลขเดือน, ชื่อย่อภาษาอังกฤษ)
+THAI_MONTHS = {
+    'มกราคม': ('01', 'Jan'), 'ม.ค.': ('01', 'Jan'), 'ม.ค': ('01', 'Jan'),
+    'กุมภาพันธ์': ('02', 'Feb'), 'ก.พ.': ('02', 'Feb'), 'ก.พ': ('02', 'Feb'),
+    'มีนาคม': ('03', 'Mar'), 'มี.ค.': ('03', 'Mar'), 'มี.ค': ('03', 'Mar'),
+    'เมษายน': ('04', 'Apr'), 'เม.ย.': ('04', 'Apr'), 'เม.ย': ('04', 'Apr'),
+    'พฤษภาคม': ('05', 'May'), 'พ.ค.': ('05', 'May'), 'พ.ค': ('05', 'May'),
+    'มิถุนายน': ('06', 'Jun'), 'มิ.ย.': ('06', 'Jun'), 'มิ.ย': ('06', 'Jun'),
+    'กรกฎาคม': ('07', 'Jul'), 'ก.ค.': ('07', 'Jul'), 'ก.ค': ('07', 'Jul'),
+    'สิงหาคม': ('08', 'Aug'), 'ส.ค.': ('08', 'Aug'), 'ส.ค': ('08', 'Aug'),
+    'กันยายน': ('09', 'Sep'), 'ก.ย.': ('09', 'Sep'), 'ก.ย': ('09', 'Sep'),
+    'ตุลาคม': ('10', 'Oct'), 'ต.ค.': ('10', 'Oct'), 'ต.ค': ('10', 'Oct'),
+    'พฤศจิกายน': ('11', 'Nov'), 'พ.ย.': ('11', 'Nov'), 'พ.ย': ('11', 'Nov'),
+    'ธันวาคม': ('12', 'Dec'), 'ธ.ค.': ('12', 'Dec'), 'ธ.ค': ('12', 'Dec'),
+}
+
+
+def parse_query(raw):
+    """
+    แปลงข้อความค้นหาของผู้ใช้เป็นรายการคำค้น:
+    - ชื่อเดือนไทย/ตัวย่อ -> เพิ่มเลขเดือนและชื่อย่อภาษาอังกฤษ
+    - ปี พ.ศ. 4 หลัก -> เพิ่มปี ค.ศ.
+    - ข้อความที่เหลือแยกตามช่องว่าง/เครื่องหมาย (คำไทยที่เขียนติดกันยังเป็นคำค้นเดียว
+      และถูกตัดคำด้วย pipeline ตอนเทียบกับดัชนี — ทุกคำย่อยต้องพบในฟิลด์เดียวกัน)
+    """
+    if not raw:
+        return []
+
+    s = thai.normalize(raw.strip())
+    tokens = []
+
+    # find 4-digit years in query and convert BE->CE if looks like BE
+    for y in re.findall(r'\b(\d{4})\b', s):
+        tokens.append(y)
+        if int(y) > 2400:  # likely Buddhist year
+            tokens.append(str(int(y) - 543))
+
+    # replace thai month names with month numbers and english short name tokens
+    for k, (mn, en) in THAI_MONTHS.items():
+        if k in s:
+            tokens.extend([k, mn, en])
+            s = s.replace(k, ' ')
+
+    tokens.extend(WORD_RE.findall(s))
+
+    # dedupe (ไม่สนตัวพิมพ์เล็ก/ใหญ่)
+    seen = set()
+    out = []
+    for t in tokens:
+        t = t.strip()
+        if t and t.lower() not in seen:
+            seen.add(t.lower())
+            out.append(t)
+    return out
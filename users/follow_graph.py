@@ -0,0 +1,60 @@
+"""
+กราฟการติดตาม (Profile.followers) แบบ adjacency list ใน cache พร้อม version ต่อผู้ใช้
+
+ตอบคำถาม "ผู้ใช้คนนี้ติดตามใครบ้าง / ใครติดตามผู้ใช้คนนี้" ด้วยการอ่าน cache ครั้งเดียว
+แทน subquery ผ่านตาราง M2M ทุกครั้ง (Profile ใช้ user เป็น primary key จึงใช้ user pk เป็น id ของโหนด)
+version ถูกเพิ่มเมื่อ followers เปลี่ยน (ดู users.signals) ทำให้ adjacency เดิมหมดอายุทันที
+"""
+from django.core.cache import cache
+
+GRAPH_CACHE_TIMEOUT = 60 * 60
+
+
+def _version(user_pk):
+    return cache.get(f"follow:v:{user_pk}", 0)
+
+
+def bump(user_pks):
+    """ทำให้ adjacency ที่ cache ไว้ของผู้ใช้เหล่านี้หมดอายุ"""
+    for pk in user_pks:
+        key = f"follow:v:{pk}"
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def _adjacency(direction, user_pk, query):
+    key = f"follow:{direction}:{user_pk}:v{_version(user_pk)}"
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(query())
+        cache.set(key, ids, GRAPH_CACHE_TIMEOUT)
+    return ids
+
+
+def _edges():
+    from .models import Profile
+
+    # แถวของตาราง M2M: from_profile = คนที่ถูกติดตาม, to_profile = ผู้ติดตาม
+    return Profile.followers.through.objects
+
+
+def following_ids(user_pk):
+    """user pk ของทุกคนที่ user_pk ติดตามอยู่"""
+    return _adjacency(
+        "out", user_pk,
+        lambda: _edges().filter(to_profile_id=user_pk).values_list("from_profile_id", flat=True),
+    )
+
+
+def follower_ids(user_pk):
+    """user pk ของทุกคนที่ติดตาม user_pk อยู่"""
+    return _adjacency(
+        "in", user_pk,
+        lambda: _edges().filter(from_profile_id=user_pk).values_list("to_profile_id", flat=True),
+    )
+
+
+def is_following(viewer_pk, target_pk):
+    return target_pk in following_ids(viewer_pk)
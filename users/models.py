@@ -124,10 +124,12 @@ class Profile(models.Model):
     )
 
     def followers_count(self):
-        return self.followers.count()
+        from .follow_graph import follower_ids
+        return len(follower_ids(self.pk))
 
     def following_count(self):
-        return Profile.objects.filter(followers=self).count()
+        from .follow_graph import following_ids
+        return len(following_ids(self.pk))
 
     def __str__(self):
         return f'{self.user.email} Profile'
@@ -0,0 +1,26 @@
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from . import follow_graph
+from .models import Profile
+
+
+@receiver(m2m_changed, sender=Profile.followers.through)
+def bump_follow_graph(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    followers เปลี่ยน -> เพิ่ม version ของทั้งสองฝั่งของเส้นที่เปลี่ยน
+    (target.followers.add(me): instance = target, pk_set = ผู้ติดตาม /
+     me.following_profiles.add(target): instance = me, pk_set = คนที่ถูกติดตาม)
+    """
+    if action == "pre_clear":
+        # clear() ไม่ส่ง pk_set มา จึงจำอีกฝั่งของเส้นไว้ก่อนลบ
+        if reverse:
+            instance._follow_clear_pks = set(follow_graph.following_ids(instance.pk))
+        else:
+            instance._follow_clear_pks = set(follow_graph.follower_ids(instance.pk))
+        return
+    if action == "post_clear":
+        pk_set = getattr(instance, "_follow_clear_pks", set())
+    elif action not in ("post_add", "post_remove"):
+        return
+    follow_graph.bump({instance.pk, *(pk_set or ())})
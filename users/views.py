@@ -10,7 +10,9 @@ from django.contrib.auth import update_session_auth_hash  # ✅ เพิ่ม
 from .forms import UserUpdateForm, ProfileUpdateForm
 from .forms import DeleteAccountForm  # ✅ เพิ่ม (ไม่ลบของเดิม)
 from .models import Profile, User
+from . import follow_graph
 from post.models import Post
+from home import feed_cache
 from activity_register.models import ActivityRegistration
 
 
@@ -107,7 +109,7 @@ def profile_detail_view(request, email):
         user=target_user
     ).select_related('post').order_by('-post__event_date', '-id')
 
-    is_following = request.user.profile in profile.followers.all()
+    is_following = follow_graph.is_following(request.user.pk, profile.pk)
 
     context = {
         'target_user': target_user,
@@ -137,12 +139,15 @@ def follow_toggle_view(request, email):
 
     is_following = False
     if my_profile != target_profile:
-        if my_profile in target_profile.followers.all():
+        # ✅ ตัดสินจากฐานข้อมูล ไม่ใช่ follow_graph (cache อาจค้าง -> กดแล้วได้ผลตรงข้าม)
+        if target_profile.followers.filter(pk=my_profile.pk).exists():
             target_profile.followers.remove(my_profile)
             is_following = False
         else:
             target_profile.followers.add(my_profile)
             is_following = True
+        # add/remove ที่ไม่เปลี่ยนอะไร (กดซ้ำ) ไม่ส่ง pk_set ให้ signal -> bump เองทั้งสองฝั่ง
+        follow_graph.bump({my_profile.pk, target_profile.pk})
 
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
         return JsonResponse({
@@ -175,6 +180,8 @@ def delete_account_confirm_view(request):
 
                     # ✅ ซ่อน/ลบโพสต์ของ user นี้ (กันระบบพัง + ไม่โชว์ในเว็บ)
                     Post.objects.filter(organizer=user).update(is_deleted=True, is_hidden=True)
+                    # update() ไม่ส่ง post_save -> ล้าง feed/ผลค้นหา/แผนที่ที่ cache ไว้เอง
+                    transaction.on_commit(feed_cache.bump_feed_version)
 
                     # ✅ soft delete user
                     user.soft_delete()